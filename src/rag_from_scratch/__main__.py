@@ -0,0 +1,15 @@
+from .cli.args import parse_args
+
+
+def main():
+    """Entry point that parses arguments before loading the RAG services"""
+    # --help and usage errors exit here, without paying for the heavy imports
+    args = parse_args()
+
+    from .cli.main import main as run
+
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+import argparse
+from pathlib import Path
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse command-line arguments without importing the RAG services"""
+    parser = argparse.ArgumentParser(
+        prog="rag-from-scratch", description="Conversational RAG"
+    )
+    parser.add_argument(
+        "--batch",
+        type=Path,
+        metavar="QUERIES_FILE",
+        help="answer the queries in a file, one per line, with the OpenAI Batch API",
+    )
+    return parser.parse_args(argv)
@@ -1,3 +1,4 @@
+import argparse
 import logging
 from datetime import datetime
 from pathlib import Path
@@ -5,24 +6,23 @@ from pathlib import Path
 from chromadb.api.models.Collection import Collection
 from openai import APIError
 
-from ..config.config import (
-    BATCH_SIZE,
-    CHROMA_DIR,
-    COLLECTION_NAME,
-    DOCS_DIR,
-    EMBEDDING_MODEL,
-    RESULTS_DIR,
-)
+from ..config.config import get_config
 from ..config.logging_config import setup_logging
 from ..core.rag_pipeline import (
     ConversationManager,
+    batch_rag_query,
     process_conversation,
 )
 from ..services.chroma_service import (
     get_collection,
     process_and_add_documents,
 )
-from ..utils.save_results import save_rag_results
+from ..services.embedding_cache import EmbeddingCache
+from ..services.openai_batch import poll_and_collect
+from ..services.quantized_index import QuantizedIndex
+from ..services.semantic_cache import SemanticCache
+from ..utils.save_results import RagResultsWriter
+from .args import parse_args
 
 logger = logging.getLogger(__name__)
 
@@ -31,7 +31,9 @@ def handle_user_query(
     conversation_manager: ConversationManager,
     collection: Collection,
     session_id: str,
-    filepath: Path | str,
+    results_writer: RagResultsWriter,
+    index: QuantizedIndex | None = None,
+    semantic_cache: SemanticCache | None = None,
 ) -> bool:
     """Handle a single user query, process it, and save the results."""
     query = input("Enter a query (or type 'exit' to end): ")
@@ -39,62 +41,150 @@ def handle_user_query(
         logger.info("User chose to exit the conversation.")
         return False
 
+    # Print the response as it is streamed
+    streamed = []
+
+    def print_token(token: str) -> None:
+        if not streamed:
+            print("Response: ", end="")
+        streamed.append(token)
+        print(token, end="", flush=True)
+
     # Process the query and get the response
     response, sources, _ = process_conversation(
         conversation_manager=conversation_manager,
         collection=collection,
         query=query,
         session_id=session_id,
+        index=index,
+        semantic_cache=semantic_cache,
+        on_token=print_token,
     )
 
-    # Display the response and sources
-    print(f"Response: {response}")
+    # Display the rest of the response, e.g. an error message, and the sources
+    if streamed:
+        print()
+    if response != "".join(streamed):
+        print(f"Response: {response}")
     if sources:
         print(f"Sources:\n{sources}")
 
     # Save results
-    results = {
-        "query": query,
-        "response": response,
-        "sources": "\n".join(sources),
-    }
-    save_rag_results(filepath=filepath, results=results)
+    results_writer.append(query=query, response=response, sources=sources)
     logger.info("Results saved successfully")
     return True
 
 
-def main():
+def run_batch(
+    collection: Collection,
+    queries_path: Path,
+    results_writer: RagResultsWriter,
+    index: QuantizedIndex | None = None,
+) -> None:
+    """Answer the queries in a file, one per line, with the OpenAI Batch API"""
+    queries = [line.strip() for line in queries_path.read_text().splitlines()]
+    queries = [query for query in queries if query]
+    if not queries:
+        logger.warning(f"No queries found in {queries_path}")
+        return
+
+    batch_id, all_sources = batch_rag_query(
+        collection=collection, queries=queries, index=index
+    )
+    responses = poll_and_collect(batch_id, queries)
+    results_writer.extend(
+        {"query": query, "response": responses.get(query, ""), "sources": sources}
+        for query, sources in zip(queries, all_sources)
+    )
+    logger.info(f"Saved {len(responses)} batch results to {results_writer.filepath}")
+
+
+def main(args: argparse.Namespace | None = None):
     """Main function for conversational RAG"""
-    # Set up logging
+    if args is None:
+        args = parse_args()
+
+    # Load configuration and set up logging
+    cfg = get_config()
     setup_logging()
     logger.info("Starting conversational RAG")
 
     # Create filename with timestamp for save to csv
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filepath = RESULTS_DIR / f"rag_results_{timestamp}.csv"
+    filepath = cfg.results_dir / f"rag_results_{timestamp}.csv"
 
     try:
         # Initialize collection and process documents
         collection = get_collection(
-            path=CHROMA_DIR, model_name=EMBEDDING_MODEL, collection_name=COLLECTION_NAME
+            path=cfg.chroma_dir,
+            model_name=cfg.embedding_model,
+            collection_name=cfg.collection_name,
+            dtype=cfg.embedding_dtype,
+            hnsw_construction_ef=cfg.hnsw_construction_ef,
+            hnsw_m=cfg.hnsw_m,
+            hnsw_search_ef=cfg.hnsw_search_ef,
         )
+        index = None
+        if cfg.quantized_search:
+            index = QuantizedIndex(
+                path=cfg.chroma_dir / f"{cfg.collection_name}_int8.npz",
+                model_name=cfg.embedding_model,
+                dtype=cfg.embedding_dtype,
+            )
         process_and_add_documents(
-            collection=collection, folder_path=DOCS_DIR, batch_size=BATCH_SIZE
+            collection=collection,
+            folder_path=cfg.docs_dir,
+            batch_size=cfg.batch_size,
+            embed_batch_size=cfg.embed_batch_size,
+            model_name=cfg.embedding_model,
+            dtype=cfg.embedding_dtype,
+            index=index,
+            cache=EmbeddingCache(cfg.embedding_cache_path),
+            chunk_size=cfg.chunk_size,
+            tokenizer_model=cfg.chunk_tokenizer_model,
         )
+        if index is not None:
+            index.sync(collection)
         logger.info("Document processing completed successfully")
 
+        if args.batch is not None:
+            with RagResultsWriter(filepath) as results_writer:
+                run_batch(
+                    collection=collection,
+                    queries_path=args.batch,
+                    results_writer=results_writer,
+                    index=index,
+                )
+            return
+
+        semantic_cache = None
+        if cfg.semantic_cache_enabled:
+            semantic_cache = SemanticCache(
+                collection=get_collection(
+                    path=cfg.chroma_dir,
+                    model_name=cfg.embedding_model,
+                    collection_name=cfg.semantic_cache_collection,
+                    dtype=cfg.embedding_dtype,
+                ),
+                max_distance=cfg.semantic_cache_max_distance,
+                ttl=cfg.semantic_cache_ttl,
+            )
+
         # Initialize conversation manager and create a session
         conversation_manager = ConversationManager()
         session_id = conversation_manager.create_session()
 
-        # Continuous conversation loop
-        while handle_user_query(
-            conversation_manager=conversation_manager,
-            collection=collection,
-            session_id=session_id,
-            filepath=filepath,
-        ):
-            pass
+        # Continuous conversation loop, keeping the results file open throughout
+        with RagResultsWriter(filepath) as results_writer:
+            while handle_user_query(
+                conversation_manager=conversation_manager,
+                collection=collection,
+                session_id=session_id,
+                results_writer=results_writer,
+                index=index,
+                semantic_cache=semantic_cache,
+            ):
+                pass
 
     except FileNotFoundError as e:
         logger.error(f"File or directory not found: {e}")
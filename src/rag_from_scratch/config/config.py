@@ -1,44 +1,113 @@
 import os
 import tomllib
+from dataclasses import dataclass
+from functools import cache
 from pathlib import Path
 
 from dotenv import load_dotenv
 
-# Load environment variables for sensitive data
-load_dotenv()
-OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
-if not OPENAI_API_KEY:
-    raise ValueError("OPENAI_API_KEY environment variable is not set")
-
-# Load TOML config
 PACKAGE_ROOT = Path(__file__).parent.parent
 CONFIG_PATH = PACKAGE_ROOT / "config" / "config.toml"
-if not CONFIG_PATH.exists():
-    raise FileNotFoundError(f"Configuration file not found: {CONFIG_PATH}")
-
-with open(CONFIG_PATH, "rb") as f:
-    config = tomllib.load(f)
-
-# OpenAI Configuration
-OPENAI_MODEL = config["openai"]["model"]
-OPENAI_TEMPERATURE = config["openai"]["temperature"]
-OPENAI_MAX_TOKENS = config["openai"]["max_tokens"]
-
-# Paths Configuration
-RESULTS_DIR = Path(config["paths"]["results_dir"])
-DOCS_DIR = Path(config["paths"]["docs_dir"])
-CHROMA_DIR = Path(config["paths"]["chroma_dir"])
-
-# ChromaDB Configuration
-EMBEDDING_MODEL = config["chroma"]["embedding_model"]
-COLLECTION_NAME = config["chroma"]["collection_name"]
-BATCH_SIZE = config["chroma"]["batch_size"]
-
-# Logging Configuration
-LOG_LEVEL = config["logging"]["level"]
-LOG_FILE = config["logging"]["log_file"]
-
-# Ensure required directories exist
-RESULTS_DIR.mkdir(exist_ok=True)
-DOCS_DIR.mkdir(exist_ok=True)
-CHROMA_DIR.mkdir(exist_ok=True)
+
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    """Settings loaded from config.toml and the environment"""
+
+    # OpenAI Configuration
+    openai_api_key: str
+    openai_model: str
+    openai_temperature: float
+    openai_max_tokens: int
+
+    # LLM Response Cache Configuration
+    llm_cache_enabled: bool
+    llm_cache_path: Path
+    llm_cache_ttl: float
+
+    # Semantic Cache Configuration
+    semantic_cache_enabled: bool
+    semantic_cache_collection: str
+    semantic_cache_max_distance: float
+    semantic_cache_ttl: float
+
+    # Paths Configuration
+    results_dir: Path
+    docs_dir: Path
+    chroma_dir: Path
+
+    # Chunking Configuration
+    chunk_size: int
+    chunk_tokenizer_model: str | None
+
+    # ChromaDB Configuration
+    embedding_model: str
+    embedding_dtype: str
+    collection_name: str
+    batch_size: int
+    embed_batch_size: int
+    hnsw_construction_ef: int
+    hnsw_m: int
+    hnsw_search_ef: int
+    quantized_search: bool
+    embedding_cache_path: Path
+
+    # Logging Configuration
+    log_level: str
+    log_file: str
+
+
+@cache
+def get_config() -> Config:
+    """Load the configuration once per process and create its directories"""
+    # Load environment variables for sensitive data
+    load_dotenv()
+    openai_api_key = os.environ.get("OPENAI_API_KEY")
+    if not openai_api_key:
+        raise ValueError("OPENAI_API_KEY environment variable is not set")
+
+    # Load TOML config
+    if not CONFIG_PATH.exists():
+        raise FileNotFoundError(f"Configuration file not found: {CONFIG_PATH}")
+
+    with open(CONFIG_PATH, "rb") as f:
+        config = tomllib.load(f)
+
+    cfg = Config(
+        openai_api_key=openai_api_key,
+        openai_model=config["openai"]["model"],
+        openai_temperature=config["openai"]["temperature"],
+        openai_max_tokens=config["openai"]["max_tokens"],
+        llm_cache_enabled=config["llm_cache"]["enabled"],
+        llm_cache_path=Path(config["llm_cache"]["path"]),
+        llm_cache_ttl=config["llm_cache"]["ttl_seconds"],
+        semantic_cache_enabled=config["semantic_cache"]["enabled"],
+        semantic_cache_collection=config["semantic_cache"]["collection_name"],
+        semantic_cache_max_distance=config["semantic_cache"]["max_distance"],
+        semantic_cache_ttl=config["semantic_cache"]["ttl_seconds"],
+        results_dir=Path(config["paths"]["results_dir"]),
+        docs_dir=Path(config["paths"]["docs_dir"]),
+        chroma_dir=Path(config["paths"]["chroma_dir"]),
+        chunk_size=config["chunking"]["chunk_size"],
+        chunk_tokenizer_model=config["chunking"]["tokenizer_model"] or None,
+        embedding_model=config["chroma"]["embedding_model"],
+        embedding_dtype=config["chroma"]["embedding_dtype"],
+        collection_name=config["chroma"]["collection_name"],
+        batch_size=config["chroma"]["batch_size"],
+        embed_batch_size=config["chroma"]["embed_batch_size"],
+        hnsw_construction_ef=config["chroma"]["hnsw_construction_ef"],
+        hnsw_m=config["chroma"]["hnsw_m"],
+        hnsw_search_ef=config["chroma"]["hnsw_search_ef"],
+        quantized_search=config["chroma"]["quantized_search"],
+        embedding_cache_path=Path(config["chroma"]["embedding_cache_path"]),
+        log_level=config["logging"]["level"],
+        log_file=config["logging"]["log_file"],
+    )
+
+    # Ensure required directories exist
+    cfg.results_dir.mkdir(exist_ok=True)
+    cfg.docs_dir.mkdir(exist_ok=True)
+    cfg.chroma_dir.mkdir(exist_ok=True)
+    cfg.llm_cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+    return cfg
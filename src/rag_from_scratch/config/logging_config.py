@@ -1,16 +1,20 @@
 import logging
 import sys
 
-from .config import LOG_FILE, LOG_LEVEL
+from .config import get_config
 
 
-def setup_logging(level: str = LOG_LEVEL, log_file: str = LOG_FILE) -> None:
+def setup_logging(level: str | None = None, log_file: str | None = None) -> None:
     """Configure logging for the project.
 
     Args:
-        level: The logging level to use
-        log_file: Path to write logs to
+        level: The logging level to use, by default from the config
+        log_file: Path to write logs to, by default from the config
     """
+    cfg = get_config()
+    level = level or cfg.log_level
+    log_file = log_file or cfg.log_file
+
     # Create formatter
     formatter = logging.Formatter(
         "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
@@ -1,33 +1,44 @@
-def get_common_abbreviations() -> set[str]:
-    """Return a set of common abbreviations that contain periods"""
-    return {
-        "mr.",
-        "mrs.",
-        "ms.",
-        "dr.",
-        "prof.",
-        "sr.",
-        "jr.",
-        "etc.",
-        "e.g.",
-        "i.e.",
-        "vs.",
-        "v.",
-        "fig.",
-        "st.",
-        "ave.",
-        "inc.",
-        "ltd.",
-        "co.",
-        "corp.",
-        "ph.d.",
-        "m.d.",
-        "b.a.",
-        "m.a.",
-        "p.m.",
-        "a.m.",
-        "u.s.a.",
-        "u.k.",
-        "u.n.",
-        "vol.",
-    }
+from functools import cache
+
+# Common abbreviations that contain periods
+COMMON_ABBREVIATIONS = (
+    "mr.",
+    "mrs.",
+    "ms.",
+    "dr.",
+    "prof.",
+    "sr.",
+    "jr.",
+    "etc.",
+    "e.g.",
+    "i.e.",
+    "vs.",
+    "v.",
+    "fig.",
+    "st.",
+    "ave.",
+    "inc.",
+    "ltd.",
+    "co.",
+    "corp.",
+    "ph.d.",
+    "m.d.",
+    "b.a.",
+    "m.a.",
+    "p.m.",
+    "a.m.",
+    "u.s.a.",
+    "u.k.",
+    "u.n.",
+    "vol.",
+)
+
+
+@cache
+def get_common_abbreviations() -> frozenset[str]:
+    """Return the common abbreviations as a lowercase frozenset.
+
+    Built once per process, as sentence splitting compares abbreviations with
+    lowercased text and looks up its compiled patterns by this frozenset.
+    """
+    return frozenset(abbreviation.lower() for abbreviation in COMMON_ABBREVIATIONS)
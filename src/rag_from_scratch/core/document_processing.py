@@ -1,9 +1,13 @@
 import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import cache
 from pathlib import Path
 from typing import Protocol
 
-import docx
-import pypdf
+from .text_splitter import split_text
 
 logger = logging.getLogger(__name__)
 
@@ -25,22 +29,51 @@ class TextReader:
 
 
 class PDFReader(DocumentReader):
-    """Reader for PDF files"""
+    """Reader for PDF files, using PyMuPDF if installed and pypdf otherwise"""
+
+    # Backend module, imported on first use as it is only needed for PDFs
+    _backend = None
+
+    @classmethod
+    def get_backend(cls):
+        """Import the PDF library on first use and return it"""
+        if cls._backend is None:
+            try:
+                import pymupdf as backend
+            except ImportError:
+                import pypdf as backend
+            cls._backend = backend
+        return cls._backend
 
     def read(self, file_path: str | Path) -> str:
-        text = ""
-        with open(file_path, "rb") as file:
-            pdf_reader = pypdf.PdfReader(file)
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-        return text
+        backend = self.get_backend()
+        if backend.__name__ == "pymupdf":
+            with backend.open(file_path) as doc:
+                parts = [page.get_text("text") for page in doc]
+        else:
+            with open(file_path, "rb") as file:
+                pdf_reader = backend.PdfReader(file)
+                parts = [page.extract_text() for page in pdf_reader.pages]
+        return "\n".join(parts) + "\n" if parts else ""
 
 
 class DocxReader(DocumentReader):
     """Reader for Word documents"""
 
+    # python-docx, imported on first use as it is only needed for Word documents
+    _backend = None
+
+    @classmethod
+    def get_backend(cls):
+        """Import python-docx on first use and return it"""
+        if cls._backend is None:
+            import docx
+
+            cls._backend = docx
+        return cls._backend
+
     def read(self, file_path: str | Path) -> str:
-        doc = docx.Document(file_path)
+        doc = self.get_backend().Document(file_path)
         return "\n".join([paragraph.text for paragraph in doc.paragraphs])
 
 
@@ -53,20 +86,125 @@ class DocumentReaderFactory:
         ".docx": DocxReader,
     }
 
+    @classmethod
+    @cache
+    def _reader_for(cls, file_extension: str) -> DocumentReader | None:
+        """Return the shared reader for an extension; readers are stateless"""
+        reader_class = cls._readers.get(file_extension)
+        return None if reader_class is None else reader_class()
+
     @classmethod
     def get_reader(cls, file_path: str | Path) -> DocumentReader:
         """Get appropriate reader based on file extension"""
         file_path = Path(file_path)
         file_extension = file_path.suffix.lower()
 
-        reader_class = cls._readers.get(file_extension)
-        if reader_class is None:
+        reader = cls._reader_for(file_extension)
+        if reader is None:
             raise ValueError(f"Unsupported file format: {file_extension}")
 
-        return reader_class()
+        return reader
 
     @classmethod
     def read_document(cls, file_path: str | Path) -> str:
         """Convenience method to read a document"""
         reader = cls.get_reader(file_path)
         return reader.read(file_path)
+
+
+def read_documents(
+    file_paths: list[str | Path], num_workers: int | None = None
+) -> list[str]:
+    """Read documents in parallel worker processes.
+
+    Parsing PDFs and Word documents is CPU-bound Python, so processes are used
+    rather than threads. They are spawned rather than forked, which is safe
+    even if the caller has started threads (e.g. a Chroma client).
+
+    Args:
+        file_paths: Documents to read
+        num_workers: Number of worker processes, at most 4 by default
+
+    Returns:
+        list[str]: Content of each document, in the order of file_paths
+    """
+    num_workers = num_workers or min(os.cpu_count() or 1, 4)
+    with ProcessPoolExecutor(
+        max_workers=num_workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        return list(
+            executor.map(DocumentReaderFactory.read_document, file_paths, chunksize=4)
+        )
+
+
+class DocumentProcessingError(Exception):
+    """Custom exception for document processing errors"""
+
+    pass
+
+
+@dataclass
+class ChunkBatch:
+    """Chunks of one source file, stored column-wise.
+
+    The source name is kept once for the whole batch; per-chunk ids and
+    metadata dicts are only built when handing the chunks to Chroma.
+
+    Attributes:
+        source (str): Filename the chunks were read from
+        texts (list[str]): Chunk texts in document order
+        modified (int): Modification time of the file in nanoseconds
+    """
+
+    source: str
+    texts: list[str]
+    modified: int = 0
+
+    @property
+    def n(self) -> int:
+        return len(self.texts)
+
+    def ids(self) -> list[str]:
+        return [f"{self.source}_chunk_{i}" for i in range(self.n)]
+
+    def metadatas(self) -> list[dict]:
+        return [
+            {"source": self.source, "chunk": i, "modified": self.modified}
+            for i in range(self.n)
+        ]
+
+
+def process_document(
+    file_path: str | Path, chunk_size: int = 500, tokenizer_model: str | None = None
+) -> ChunkBatch:
+    """Process a single document into a batch of chunks.
+
+    Args:
+        file_path: Document to read
+        chunk_size: Maximum chunk size, passed to split_text
+        tokenizer_model: OpenAI model whose tokenizer counts the chunk size in
+            tokens; characters are counted if None
+
+    Returns:
+        ChunkBatch: The document's chunks
+    """
+    file_path = Path(file_path)
+    if not file_path.exists():
+        raise DocumentProcessingError(f"File not found: {file_path}")
+
+    try:
+        # Read the document
+        content = DocumentReaderFactory.read_document(file_path)
+    except ValueError as e:
+        raise DocumentProcessingError(f"Unsupported file format: {e}")
+    except Exception as e:
+        raise DocumentProcessingError(f"Error reading file: {e}")
+
+    # Split into chunks
+    chunks = split_text(content, chunk_size, tokenizer_model)
+    if not chunks:
+        logger.warning(f"No content chunks generated from {file_path}")
+
+    return ChunkBatch(
+        source=file_path.name, texts=chunks, modified=file_path.stat().st_mtime_ns
+    )
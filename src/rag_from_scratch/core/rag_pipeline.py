@@ -1,18 +1,30 @@
+import asyncio
 import logging
+import time
 import uuid
-from datetime import datetime
+from collections import deque
+from collections.abc import Callable
 
 from chromadb.api.models.Collection import Collection
 from openai import APIError
 
 from ..services.chroma_service import get_context_with_sources, semantic_search
+from ..services.openai_batch import submit_batch
 from ..services.openai_service import (
+    ResponseGenerationError,
     contextualize_query,
     generate_response,
+    get_prompt,
 )
+from ..services.quantized_index import QuantizedIndex
+from ..services.semantic_cache import SemanticCache
 
 logger = logging.getLogger(__name__)
 
+# Event loop reused across queries, so the async OpenAI client keeps its
+# connection pool between turns
+_runner = asyncio.Runner()
+
 
 class ConversationManager:
     """Manages conversation sessions and their history for the RAG system.
@@ -25,82 +37,129 @@ class ConversationManager:
     Attributes:
         conversations (dict): Dictionary storing conversation histories.
             Key: session_id (str)
-            Value: list of message dictionaries containing:
+            Value: deque of the last max_messages message dictionaries containing:
                 - role: "user" or "assistant"
                 - content: message text
-                - timestamp: ISO format timestamp
+                - timestamp: nanoseconds since the epoch
     """
 
     def __init__(self, max_messages: int | None = 5):
         self.conversations = {}
         self.max_messages = max_messages
+        # Formatted history per session, cleared whenever a message is added
+        self._formatted_cache: dict[str, str | None] = {}
 
     def create_session(self) -> str:
         """Create a new conversation session"""
         session_id = str(uuid.uuid4())
-        self.conversations[session_id] = []
+        self.conversations[session_id] = deque(maxlen=self.max_messages)
         return session_id
 
     def add_message(self, session_id: str, role: str, content: str) -> None:
         """Add a message to the conversation history"""
         if session_id not in self.conversations:
-            self.conversations[session_id] = []
+            self.conversations[session_id] = deque(maxlen=self.max_messages)
 
+        # Older messages fall off the deque, so memory stays bounded
         self.conversations[session_id].append(
-            {"role": role, "content": content, "timestamp": datetime.now().isoformat()}
+            {"role": role, "content": content, "timestamp": time.time_ns()}
         )
+        self._formatted_cache[session_id] = None
 
     def get_conversation_history(self, session_id: str) -> list:
         """Get conversation history for a session"""
         if session_id not in self.conversations:
             return []
 
-        history = self.conversations[session_id]
-        if self.max_messages is not None:
-            history = history[-self.max_messages :]
-
-        return history
+        # The deque already holds at most max_messages messages
+        return list(self.conversations[session_id])
 
     def format_history_for_prompt(self, session_id: str) -> str:
         """Format conversation history for inclusion in prompts"""
-        history = self.get_conversation_history(session_id)
-        formatted_history = ""
+        formatted_history = self._formatted_cache.get(session_id)
+        if formatted_history is not None:
+            return formatted_history
 
-        for msg in history:
-            role = "Human" if msg["role"] == "user" else "Assistant"
-            formatted_history += f"{role}: {msg['content']}\n\n"
-
-        return formatted_history.strip()
+        history = self.get_conversation_history(session_id)
+        roles = {"user": "Human"}
+        formatted_history = "".join(
+            f"{roles.get(msg['role'], 'Assistant')}: {msg['content']}\n\n"
+            for msg in history
+        ).strip()
+        self._formatted_cache[session_id] = formatted_history
+        return formatted_history
 
 
-def conversational_rag_query(
+async def conversational_rag_query(
     conversation_manager: ConversationManager,
     collection: Collection,
     query: str,
     session_id: str,
     n_chunks: int,
+    index: QuantizedIndex | None = None,
+    semantic_cache: SemanticCache | None = None,
+    on_token: Callable[[str], None] | None = None,
 ):
-    """Perform RAG query with conversation history"""
+    """Perform RAG query with conversation history.
+
+    Chunks for the original query are retrieved in a worker thread while the
+    query is being contextualized. They are used as is if contextualizing left
+    the query unchanged, which saves a retrieval round trip for standalone
+    questions. If on_token is given, the response is streamed to it as it is
+    generated. If generation fails, an error message is returned as the
+    response and is not stored in the semantic cache.
+    """
     # Get conversation history
     conversation_history = conversation_manager.format_history_for_prompt(
         session_id=session_id
     )
 
-    # Handle follow-up questions
-    query = contextualize_query(query=query, conversation_history=conversation_history)
-    print("Contextualized Query:", query)
-
-    # Get relevant chunks
-    semantic_search_results = semantic_search(
-        collection=collection, query=query, n_results=n_chunks
+    # Handle follow-up questions, speculatively retrieving chunks meanwhile
+    original_query = query
+    query, speculative_results = await asyncio.gather(
+        contextualize_query(query=query, conversation_history=conversation_history),
+        asyncio.to_thread(
+            semantic_search,
+            collection=collection,
+            query=original_query,
+            n_results=n_chunks,
+            index=index,
+        ),
     )
-    context, sources = get_context_with_sources(semantic_search_results)
-    print("Context:", context)
-    print("Sources:", sources)
+    print("Contextualized Query:", query)
 
-    response = generate_response(
-        query=query, context=context, conversation_history=conversation_history
-    )
+    # Reuse the answer to a previous, similar query if there is one
+    cached = semantic_cache.lookup(query) if semantic_cache is not None else None
+    if cached is not None:
+        response, sources = cached
+        semantic_search_results = {}
+        if on_token is not None:
+            on_token(response)
+    else:
+        # Get relevant chunks
+        if query.strip() == original_query.strip():
+            semantic_search_results = speculative_results
+        else:
+            semantic_search_results = semantic_search(
+                collection=collection, query=query, n_results=n_chunks, index=index
+            )
+        context, sources = get_context_with_sources(semantic_search_results)
+        print("Context:", context)
+        print("Sources:", sources)
+
+        try:
+            response = await generate_response(
+                query=query,
+                context=context,
+                conversation_history=conversation_history,
+                on_token=on_token,
+            )
+        except ResponseGenerationError as e:
+            # Shown to the user, but never cached as an answer
+            response = str(e)
+        else:
+            if semantic_cache is not None:
+                semantic_cache.store(query=query, response=response, sources=sources)
 
     # Add to conversation history
     conversation_manager.add_message(session_id=session_id, role="user", content=query)
@@ -117,16 +176,24 @@ def process_conversation(
     query: str,
     session_id: str,
     n_chunks: int = 2,
+    index: QuantizedIndex | None = None,
+    semantic_cache: SemanticCache | None = None,
+    on_token: Callable[[str], None] | None = None,
 ) -> tuple[str, list[str], dict]:
     """Process a query as part of a conversation and return response with sources"""
     logger.info(f"Processing query: {query}")
     try:
-        response, sources, semantic_search_results = conversational_rag_query(
-            conversation_manager=conversation_manager,
-            collection=collection,
-            query=query,
-            session_id=session_id,
-            n_chunks=n_chunks,
+        response, sources, semantic_search_results = _runner.run(
+            conversational_rag_query(
+                conversation_manager=conversation_manager,
+                collection=collection,
+                query=query,
+                session_id=session_id,
+                n_chunks=n_chunks,
+                index=index,
+                semantic_cache=semantic_cache,
+                on_token=on_token,
+            )
         )
         logger.info("Query processed successfully")
         return response, sources, semantic_search_results
@@ -136,3 +203,26 @@ def process_conversation(
     except Exception as e:
         logger.error(f"Error processing query: {e}")
         raise
+
+
+def batch_rag_query(
+    collection: Collection,
+    queries: list[str],
+    n_chunks: int = 2,
+    index: QuantizedIndex | None = None,
+) -> tuple[str, list[list[str]]]:
+    """Retrieve context for standalone queries and submit them as one batch job.
+
+    Returns:
+        tuple[str, list[list[str]]]: The batch id and the sources for each query
+    """
+    prompts, all_sources = [], []
+    for query in queries:
+        semantic_search_results = semantic_search(
+            collection=collection, query=query, n_results=n_chunks, index=index
+        )
+        context, sources = get_context_with_sources(semantic_search_results)
+        prompts.append(get_prompt(context, query))
+        all_sources.append(sources)
+
+    return submit_batch(prompts), all_sources
@@ -1,14 +1,35 @@
 import logging
 import re
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Iterator
+from functools import lru_cache
 
 from .abbreviations import get_common_abbreviations
 
+try:
+    # Optional: only needed to size chunks in tokens
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
 logger = logging.getLogger(__name__)
 
+# Look for: .!? followed by space and capital letter, or end of string
+_SENT_RE = re.compile(r"([.!?]+(?=\s+[A-Z]|\s*$))")
+
 
 def normalize_whitespace(text: str) -> str:
     """Replace multiple whitespace characters with a single space"""
-    return re.sub(r"\s+", " ", text)
+    # str.split and join run in C without a regex substitution per space;
+    # leading and trailing runs are kept as one space, as re.sub(r"\s+") does
+    collapsed = " ".join(text.split())
+    if not collapsed:
+        return " " if text else ""
+    if text[0].isspace():
+        collapsed = " " + collapsed
+    if text[-1].isspace():
+        collapsed += " "
+    return collapsed
 
 
 def split_into_potential_sentences(text: str) -> list[str]:
@@ -23,13 +44,28 @@ def split_into_potential_sentences(text: str) -> list[str]:
     Returns:
         list[str]: A list of potential sentences split from their punctuation.
     """
-    # Look for: .!? followed by space and capital letter, or end of string
-    return re.split(r"([.!?]+(?=\s+[A-Z]|\s*$))", text)
+    return _SENT_RE.split(text)
+
+
+@lru_cache(maxsize=8)
+def compile_abbreviations(abbreviations: frozenset[str]) -> tuple[re.Pattern, int]:
+    """Compile abbreviations into one end-anchored pattern.
+
+    Returns:
+        tuple[re.Pattern, int]: The pattern and the length of the longest
+        abbreviation, so only that many trailing characters need checking.
+    """
+    alternatives = sorted(abbreviations, key=len, reverse=True)
+    pattern = re.compile(r"(?:" + "|".join(map(re.escape, alternatives)) + r")\Z")
+    return pattern, max(map(len, abbreviations), default=0)
 
 
 def is_abbreviation_end(text: str, abbreviations: set[str]) -> bool:
     """Check if the text ends with a known abbreviation"""
-    return any(text.lower().endswith(abbr) for abbr in abbreviations)
+    if not abbreviations:
+        return False
+    pattern, max_length = compile_abbreviations(frozenset(abbreviations))
+    return pattern.search(text[-max_length:].lower()) is not None
 
 
 def reconstruct_sentences(
@@ -50,6 +86,8 @@ def reconstruct_sentences(
     """
     sentences = []
     current_sentence = ""
+    # Hashable, so the compiled pattern is reused across boundaries
+    abbreviations = frozenset(abbreviations)
 
     for i in range(0, len(potential_sentences) - 1, 2):
         current_part = potential_sentences[i].strip()
@@ -72,8 +110,121 @@ def reconstruct_sentences(
     return sentences
 
 
-def create_chunks(sentences: list[str], chunk_size: int) -> list[str]:
-    """Create chunks of text from sentences, respecting maximum chunk size"""
+@lru_cache(maxsize=8)
+def compile_sentence_boundaries(abbreviations: frozenset[str]) -> re.Pattern | None:
+    """Compile a sentence boundary pattern that skips abbreviation ends.
+
+    Each group of equally long abbreviations becomes a case-insensitive
+    negative lookbehind, so boundaries right after an abbreviation are
+    rejected inside the regex engine instead of being checked one by one.
+
+    Returns:
+        re.Pattern | None: The pattern, or None if some abbreviation cannot be
+        matched this way (not lowercase ASCII, containing whitespace, or not
+        ending in a period after a letter or digit)
+    """
+    by_length = defaultdict(list)
+    for abbreviation in abbreviations:
+        if not (
+            abbreviation.isascii()
+            and abbreviation == abbreviation.lower()
+            and re.fullmatch(r"\S*[^\s.!?]\.", abbreviation)
+        ):
+            return None
+        by_length[len(abbreviation)].append(re.escape(abbreviation))
+    if not by_length:
+        return None
+
+    not_after = "".join(
+        "(?<!(?ai:" + "|".join(escaped) + "))" for escaped in by_length.values()
+    )
+    return re.compile(r"[.!?]+" + not_after + r"(?=\s+[A-Z]|\s*$)")
+
+
+def iter_sentences(text: str, abbreviations: set[str]) -> Iterator[str]:
+    """Yield the sentences of text in a single pass over the punctuation matches.
+
+    Equivalent to reconstruct_sentences(split_into_potential_sentences(text)),
+    without building the intermediate lists. Where possible, punctuation after
+    an abbreviation is skipped by the compiled boundary pattern, so only
+    punctuation after whitespace, as in "Dr .", still needs checking here.
+
+    Args:
+        text (str): Text with normalized whitespace
+        abbreviations (set[str]): A set of common abbreviations.
+
+    Yields:
+        str: Each sentence, stripped of surrounding whitespace.
+    """
+    abbreviations = frozenset(abbreviations)
+    boundaries = compile_sentence_boundaries(abbreviations)
+    # The Kelvin sign lowercases to an ASCII "k" the lookbehinds would miss
+    check_all = boundaries is None or "\u212a" in text
+    if check_all:
+        boundaries = _SENT_RE
+
+    pending = []  # Parts of a sentence that so far end in an abbreviation
+    start = 0
+    for match in boundaries.finditer(text):
+        end = match.start()
+        part = text[start:end].strip() + match.group()
+        start = match.end()
+        if (check_all or text[end - 1 : end].isspace()) and is_abbreviation_end(
+            part, abbreviations
+        ):
+            pending.append(part)
+        elif pending:
+            pending.append(part)
+            yield " ".join(pending)
+            pending = []
+        else:
+            yield part
+
+    # Punctuation the pattern skipped in the unterminated tail all follows
+    # abbreviations; split it off so the tail is joined as reconstruct_sentences
+    # joins it
+    if not check_all:
+        for match in _SENT_RE.finditer(text, start):
+            pending.append(text[start : match.start()].strip() + match.group())
+            start = match.end()
+
+    # Handle any remaining text
+    rest = text[start:]
+    if pending:
+        pending.append(rest)
+        yield " ".join(pending).strip()
+    elif rest.strip():
+        yield rest.strip()
+
+
+@lru_cache
+def get_token_counter(model_name: str) -> Callable[[str], int]:
+    """Return a function counting the tokens of a text for an OpenAI model"""
+    if tiktoken is None:
+        raise ImportError(
+            "Token-based chunking requires tiktoken: "
+            "pip install 'rag-from-scratch[tokens]'"
+        )
+    encoding = tiktoken.encoding_for_model(model_name)
+    return lambda text: len(encoding.encode_ordinary(text))
+
+
+def create_chunks(
+    sentences: Iterable[str],
+    chunk_size: int,
+    length_function: Callable[[str], int] = len,
+) -> list[str]:
+    """Create chunks of text from sentences, respecting maximum chunk size.
+
+    Args:
+        sentences (Iterable[str]): Sentences in document order.
+        chunk_size (int): Maximum chunk size, as measured by length_function.
+        length_function (Callable[[str], int]): Size of a sentence, in
+            characters by default.
+
+    Returns:
+        list[str]: Chunks of whole sentences joined by spaces.
+    """
     chunks = []
     current_chunk = []
     current_size = 0
@@ -83,7 +234,7 @@ def create_chunks(sentences: list[str], chunk_size: int) -> list[str]:
         if not sentence:
             continue
 
-        sentence_size = len(sentence)
+        sentence_size = length_function(sentence)
 
         # Check if adding this sentence would exceed chunk size
         if current_size + sentence_size > chunk_size and current_chunk:
@@ -101,10 +252,16 @@ def create_chunks(sentences: list[str], chunk_size: int) -> list[str]:
     return chunks
 
 
-def split_text(text: str, chunk_size: int = 500) -> list[str]:
-    """Split text into chunks while preserving sentence boundaries"""
+def split_text(
+    text: str, chunk_size: int = 500, tokenizer_model: str | None = None
+) -> list[str]:
+    """Split text into chunks while preserving sentence boundaries.
+
+    Chunk size is counted in characters, or in tokens of the given OpenAI
+    model's tokenizer if tokenizer_model is set.
+    """
     text = normalize_whitespace(text)
-    abbreviations = get_common_abbreviations()
-    potential_sentences = split_into_potential_sentences(text)
-    sentences = reconstruct_sentences(potential_sentences, abbreviations)
-    return create_chunks(sentences, chunk_size)
+    sentences = iter_sentences(text, get_common_abbreviations())
+    if tokenizer_model is None:
+        return create_chunks(sentences, chunk_size)
+    return create_chunks(sentences, chunk_size, get_token_counter(tokenizer_model))
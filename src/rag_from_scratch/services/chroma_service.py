@@ -1,50 +1,39 @@
 import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from uuid import UUID
 
 import chromadb
+import numpy as np
 from chromadb.api.models.Collection import Collection
 from chromadb.api.types import EmbeddingFunction
 from chromadb.errors import InvalidCollectionException
-from chromadb.utils import embedding_functions
 
-from ..core.document_processing import DocumentReaderFactory
-from ..core.text_splitter import split_text
+from ..core.document_processing import (
+    ChunkBatch,
+    DocumentProcessingError,
+    DocumentReaderFactory,
+    process_document,
+)
+from .embedding_cache import EmbeddingCache
+from .embedding_service import SentenceTransformerEmbedder, encode_texts
+from .quantized_index import MAX_BRUTE_FORCE_SIZE, QuantizedIndex
 
 logger = logging.getLogger(__name__)
 
+SUPPORTED_EXTENSIONS: frozenset[str] = frozenset(DocumentReaderFactory._readers)
 
-class DocumentProcessingError(Exception):
-    """Custom exception for document processing errors"""
+# Modification times of the source files already in each collection, keyed by
+# collection id and then filename
+_processed_files: dict[UUID, dict[str, int]] = {}
 
-    pass
 
-
-def process_document(file_path: str | Path) -> tuple[list[str], list[str], list[dict]]:
-    """Process a single document into chunks with ids and metadata"""
-    file_path = Path(file_path)
-    if not file_path.exists():
-        raise DocumentProcessingError(f"File not found: {file_path}")
-
-    try:
-        # Read the document
-        content = DocumentReaderFactory.read_document(file_path)
-    except ValueError as e:
-        raise DocumentProcessingError(f"Unsupported file format: {e}")
-    except Exception as e:
-        raise DocumentProcessingError(f"Error reading file: {e}")
-
-    # Split into chunks
-    chunks = split_text(content)
-    if not chunks:
-        logger.warning(f"No content chunks generated from {file_path}")
-        return [], [], []
-
-    # Prepare metadata
-    file_name = file_path.name
-    metadatas = [{"source": file_name, "chunk": i} for i in range(len(chunks))]
-    ids = [f"{file_name}_chunk_{i}" for i in range(len(chunks))]
-
-    return ids, chunks, metadatas
+def get_max_batch_size(collection: Collection, default: int = 5000) -> int:
+    """Largest number of records the collection's client accepts per add"""
+    get_max = getattr(collection._client, "get_max_batch_size", None)
+    return get_max() if get_max is not None else default
 
 
 def add_to_collection(
@@ -52,20 +41,26 @@ def add_to_collection(
     ids: list[str],
     texts: list[str],
     metadatas: list[dict],
+    embeddings: np.ndarray,
     batch_size: int,
 ) -> None:
-    """Add documents to collection in batches"""
+    """Add documents with precomputed embeddings to collection in batches.
+
+    The batch size is capped at the client's maximum batch size.
+    """
     if not texts:
         return
 
-    if not (len(ids) == len(texts) == len(metadatas)):
-        raise ValueError("Mismatched lengths for ids, texts, and metadatas")
+    if not (len(ids) == len(texts) == len(metadatas) == len(embeddings)):
+        raise ValueError("Mismatched lengths for ids, texts, metadatas, and embeddings")
 
+    batch_size = min(batch_size, get_max_batch_size(collection))
     for i in range(0, len(texts), batch_size):
         end_idx = min(i + batch_size, len(texts))
         try:
             collection.add(
                 documents=texts[i:end_idx],
+                embeddings=embeddings[i:end_idx],
                 metadatas=metadatas[i:end_idx],
                 ids=ids[i:end_idx],
             )
@@ -74,26 +69,115 @@ def add_to_collection(
             raise
 
 
-def get_supported_extensions() -> set[str]:
+def get_supported_extensions() -> frozenset[str]:
     """Get set of supported file extensions"""
-    return set(DocumentReaderFactory._readers.keys())
+    return SUPPORTED_EXTENSIONS
+
 
+def get_processed_files(collection: Collection) -> dict[str, int]:
+    """Get the files that have already been processed.
 
-def get_processed_files(collection: Collection) -> set[str]:
-    """Get set of files that have already been processed"""
-    # Get all metadatas from collection
-    results = collection.get()
-    if not results["metadatas"]:
-        return set()
+    The files are read from the collection once per process and then kept up
+    to date by process_and_add_documents.
+
+    Returns:
+        dict[str, int]: Modification time in nanoseconds of each source file
+        when it was added, or 0 if it was added without one
+    """
+    if collection.id in _processed_files:
+        return _processed_files[collection.id]
+
+    # Get only the metadatas from collection, not documents or embeddings
+    results = collection.get(include=["metadatas"])
 
     # Extract unique source filenames
-    return {meta["source"] for meta in results["metadatas"]}
+    sources = {
+        meta["source"]: meta.get("modified", 0) for meta in results["metadatas"] or []
+    }
+    _processed_files[collection.id] = sources
+    return sources
+
+
+def remove_document(
+    collection: Collection, source: str, index: QuantizedIndex | None = None
+) -> None:
+    """Delete every chunk of a source file from the collection and index"""
+    ids = collection.get(where={"source": source}, include=[])["ids"]
+    if ids:
+        collection.delete(ids=ids)
+        if index is not None:
+            index.remove(ids)
+    get_processed_files(collection).pop(source, None)
+
+
+def add_chunk_batches(
+    collection: Collection,
+    batches: list[ChunkBatch],
+    batch_size: int,
+    embed_batch_size: int = 64,
+    model_name: str = "all-MiniLM-L6-v2",
+    dtype: str = "auto",
+    index: QuantizedIndex | None = None,
+    cache: EmbeddingCache | None = None,
+) -> int:
+    """Embed chunk batches and add them to the collection.
+
+    Returns:
+        Number of chunks added
+    """
+    # Materialize per-chunk ids and metadata only at the Chroma boundary
+    all_texts = [text for batch in batches for text in batch.texts]
+    all_ids = [id_ for batch in batches for id_ in batch.ids()]
+    all_metadatas = [meta for batch in batches for meta in batch.metadatas()]
+    embeddings = encode_texts(
+        all_texts,
+        model_name,
+        batch_size=embed_batch_size,
+        dtype=dtype,
+        show_progress_bar=True,
+        cache=cache,
+    )
+    add_to_collection(
+        collection, all_ids, all_texts, all_metadatas, embeddings, batch_size
+    )
+    if index is not None:
+        index.add(all_ids, embeddings)
+    get_processed_files(collection).update(
+        (batch.source, batch.modified) for batch in batches
+    )
+    return len(all_texts)
 
 
 def process_and_add_documents(
-    collection: Collection, folder_path: str | Path, batch_size: int
+    collection: Collection,
+    folder_path: str | Path,
+    batch_size: int,
+    embed_batch_size: int = 64,
+    model_name: str = "all-MiniLM-L6-v2",
+    dtype: str = "auto",
+    index: QuantizedIndex | None = None,
+    cache: EmbeddingCache | None = None,
+    chunk_size: int = 500,
+    tokenizer_model: str | None = None,
 ) -> None:
-    """Process all documents in a folder and add to collection"""
+    """Process all documents in a folder and add to collection.
+
+    Files are read and split in parallel worker processes, since PDF and Word
+    parsing is CPU-bound. Parsed files are consumed as they complete, and once
+    at least batch_size chunks are pending they are embedded and added in this
+    process while the workers carry on parsing the remaining files, with
+    embed_batch_size texts per model forward pass. If an index is given, the
+    new embeddings are also added to it. The workers are spawned, so scripts
+    calling this need an if __name__ == "__main__" guard.
+
+    Files modified since they were added are processed again, and their old
+    chunks are removed once the new version has been parsed; if parsing fails
+    the old chunks are kept. Unchanged chunks are found in the embedding cache
+    and not re-encoded.
+
+    Chunks hold up to chunk_size characters, or tokens of the tokenizer_model
+    tokenizer if one is given.
+    """
     folder_path = Path(folder_path)
     if not folder_path.is_dir():
         raise ValueError(f"Invalid folder path: {folder_path}")
@@ -101,67 +185,160 @@ def process_and_add_documents(
     # Get already processed files
     processed_files = get_processed_files(collection)
 
-    # Get list of files to process
+    # Get list of files to process. DirEntry caches the file type from the
+    # directory listing, so is_file() needs no extra stat call per entry.
     supported_extensions = get_supported_extensions()
-    files = [
-        file
-        for file in folder_path.iterdir()
-        if file.is_file()
-        and file.suffix.lower() in supported_extensions
-        and file.name not in processed_files  # Only process new files
-    ]
+    files = []
+    changed = set()
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if not (
+                entry.is_file()
+                and os.path.splitext(entry.name)[1].lower() in supported_extensions
+            ):
+                continue
+            if entry.name in processed_files:
+                # Files added without a modification time are never refreshed
+                modified = processed_files[entry.name]
+                if not modified or modified == entry.stat().st_mtime_ns:
+                    continue
+                logger.info(f"File changed since it was added: {entry.name}")
+                changed.add(entry.name)
+            files.append(Path(entry.path))
 
     if not files:
         logger.info("No new files to process")
         return
 
-    for file_path in files:
-        try:
+    def flush() -> int:
+        added = add_chunk_batches(
+            collection,
+            pending,
+            batch_size,
+            embed_batch_size,
+            model_name,
+            dtype,
+            index,
+            cache,
+        )
+        pending.clear()
+        return added
+
+    pending: list[ChunkBatch] = []
+    pending_chunks = total_added = 0
+    max_workers = min(len(files), os.cpu_count() or 1)
+    # Spawned rather than forked, as the Chroma client has started threads
+    # whose locks a forked child could inherit in a held state
+    with ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        futures = {}
+        for file_path in files:
             logger.info(f"Processing new file: {file_path.name}...")
-            ids, texts, metadatas = process_document(file_path)
-            add_to_collection(collection, ids, texts, metadatas, batch_size)
-            logger.info(f"Added {len(texts)} chunks to collection")
-        except DocumentProcessingError as e:
-            logger.error(f"Error processing {file_path}: {e}")
-            continue
-        except Exception as e:
-            logger.error(f"Unexpected error processing {file_path}: {e}")
-            raise
-
-
-def get_embedding_function(model_name: str = "all-MiniLM-L6-v2") -> EmbeddingFunction:
+            future = executor.submit(
+                process_document, file_path, chunk_size, tokenizer_model
+            )
+            futures[future] = file_path
+
+        for future in as_completed(futures):
+            file_path = futures[future]
+            try:
+                batch = future.result()
+            except DocumentProcessingError as e:
+                logger.error(f"Error processing {file_path}: {e}")
+                continue
+            except Exception as e:
+                logger.error(f"Unexpected error processing {file_path}: {e}")
+                raise
+            # The old chunks of a changed file are kept until it parses again
+            if file_path.name in changed:
+                remove_document(collection, file_path.name, index)
+            if not batch.n:
+                continue
+
+            pending.append(batch)
+            pending_chunks += batch.n
+            if pending_chunks >= batch_size:
+                total_added += flush()
+                pending_chunks = 0
+
+    if pending:
+        total_added += flush()
+    if total_added:
+        logger.info(f"Added {total_added} chunks to collection")
+    if index is not None:
+        # Written once here rather than after every flush
+        index.save()
+
+
+def get_embedding_function(
+    model_name: str = "all-MiniLM-L6-v2", dtype: str = "auto"
+) -> EmbeddingFunction:
     """Create and return a sentence transformer embedding function.
 
     Args:
         model_name: Name of the sentence transformer model to use
+        dtype: Inference precision ("auto", "float32", "float16" or "bfloat16")
 
     Returns:
-        SentenceTransformerEmbeddingFunction instance
+        SentenceTransformerEmbedder instance sharing the cached ingest model
     """
-    return embedding_functions.SentenceTransformerEmbeddingFunction(
-        model_name=model_name
-    )
+    return SentenceTransformerEmbedder(model_name=model_name, dtype=dtype)
+
+
+def get_hnsw_metadata(
+    construction_ef: int = 200, m: int = 32, search_ef: int = 64
+) -> dict:
+    """Collection metadata configuring the HNSW index of a new collection.
+
+    Embeddings are L2-normalized, so inner product ranks like cosine without
+    hnswlib normalizing every vector again. The index is built with one thread
+    per CPU.
+    """
+    return {
+        "hnsw:space": "ip",
+        "hnsw:construction_ef": construction_ef,
+        "hnsw:M": m,
+        "hnsw:search_ef": search_ef,
+        "hnsw:num_threads": os.cpu_count() or 1,
+    }
 
 
 def create_collection(
     path: str | Path = "./chroma",
     model_name: str = "all-MiniLM-L6-v2",
     collection_name: str = "documents_collection",
+    dtype: str = "auto",
+    hnsw_construction_ef: int = 200,
+    hnsw_m: int = 32,
+    hnsw_search_ef: int = 64,
 ) -> Collection:
-    """Create or get existing collection with sentence transformer embeddings"""
+    """Create or get existing collection with sentence transformer embeddings.
+
+    The HNSW parameters only apply when the collection is created; an existing
+    collection keeps the index settings it was created with.
+    """
     # Initialize ChromaDB client
-    client = chromadb.PersistentClient(path=str(Path(path)))
+    client = chromadb.PersistentClient(
+        path=path if isinstance(path, str) else str(path)
+    )
+
+    # Queries are embedded by the same model that embedded the documents
+    sentence_transformer_ef = get_embedding_function(model_name, dtype)
 
     # Check if collection exists
     try:
         # Try to get existing collection
-        collection = client.get_collection(name=collection_name)
+        collection = client.get_collection(
+            name=collection_name, embedding_function=sentence_transformer_ef
+        )
         logger.info(f"Retrieved existing collection: {collection_name}")
     except InvalidCollectionException:
         # Collection doesn't exist, create new one with embedding function
-        sentence_transformer_ef = get_embedding_function(model_name)
         collection = client.create_collection(
-            name=collection_name, embedding_function=sentence_transformer_ef
+            name=collection_name,
+            embedding_function=sentence_transformer_ef,
+            metadata=get_hnsw_metadata(hnsw_construction_ef, hnsw_m, hnsw_search_ef),
         )
         logger.info(f"Created new collection: {collection_name}")
 
@@ -172,20 +349,50 @@ def get_collection(
     path: str | Path,
     model_name: str,
     collection_name: str,
+    dtype: str = "auto",
+    hnsw_construction_ef: int = 200,
+    hnsw_m: int = 32,
+    hnsw_search_ef: int = 64,
 ) -> Collection:
     """Get or create a collection with sentence transformer embeddings"""
     collection = create_collection(
         path=path,
         model_name=model_name,
         collection_name=collection_name,
+        dtype=dtype,
+        hnsw_construction_ef=hnsw_construction_ef,
+        hnsw_m=hnsw_m,
+        hnsw_search_ef=hnsw_search_ef,
     )
     return collection
 
 
-def semantic_search(collection: Collection, query: str, n_results: int = 2) -> dict:
-    """Perform semantic search on the collection"""
-    results = collection.query(query_texts=[query], n_results=n_results)
-    return results
+def semantic_search(
+    collection: Collection,
+    query: str,
+    n_results: int = 2,
+    index: QuantizedIndex | None = None,
+) -> dict:
+    """Perform semantic search on the collection.
+
+    When a quantized index is given and small enough for a brute-force scan, it
+    is used to find the nearest chunks and only their documents and metadata
+    are fetched from the collection. Otherwise the collection's HNSW index is
+    queried directly.
+    """
+    if index is None or not 0 < len(index) <= MAX_BRUTE_FORCE_SIZE:
+        return collection.query(query_texts=[query], n_results=n_results)
+
+    ids, distances = index.search(query, n_results)
+    records = collection.get(ids=ids, include=["documents", "metadatas"])
+    position = {id_: i for i, id_ in enumerate(records["ids"])}
+    order = [position[id_] for id_ in ids]
+    return {
+        "ids": [ids],
+        "documents": [[records["documents"][i] for i in order]],
+        "metadatas": [[records["metadatas"][i] for i in order]],
+        "distances": [distances],
+    }
 
 
 def get_context_with_sources(results: dict) -> tuple[str, list[str]]:
@@ -194,9 +401,14 @@ def get_context_with_sources(results: dict) -> tuple[str, list[str]]:
     context = "\n\n".join(results["documents"][0])
 
     # Format sources with metadata and distances
-    sources = [
-        f"{meta['source']} (chunk {meta['chunk']}, dist {round(dist, 4)})"
-        for meta, dist in zip(results["metadatas"][0], results["distances"][0])
-    ]
+    metadatas = results["metadatas"][0]
+    sources = list(
+        map(
+            "{} (chunk {}, dist {:.4f})".format,
+            (meta["source"] for meta in metadatas),
+            (meta["chunk"] for meta in metadatas),
+            results["distances"][0],
+        )
+    )
 
     return context, sources
@@ -0,0 +1,57 @@
+import hashlib
+import logging
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def hash_text(text: str) -> bytes:
+    """Return a 16-byte BLAKE2b digest identifying a chunk's content"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+class EmbeddingCache:
+    """SQLite-backed store of chunk embeddings keyed by content hash and model.
+
+    Attributes:
+        path (Path): Location of the SQLite database file
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache "
+            "(hash BLOB, model TEXT, vec BLOB, PRIMARY KEY (hash, model))"
+        )
+        self._conn.commit()
+
+    def get_many(self, hashes: list[bytes], model: str) -> dict[bytes, np.ndarray]:
+        """Return cached embeddings for the given hashes, skipping misses"""
+        found = {}
+        # Stay below SQLite's limit on the number of bound parameters
+        for i in range(0, len(hashes), 500):
+            batch = hashes[i : i + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT hash, vec FROM cache WHERE model = ? AND hash IN ({placeholders})",
+                (model, *batch),
+            )
+            for hash_, vec in rows:
+                found[hash_] = np.frombuffer(vec, dtype=np.float32)
+        return found
+
+    def put_many(self, hashes: list[bytes], embeddings: np.ndarray, model: str) -> None:
+        """Store embeddings for the given hashes"""
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO cache (hash, model, vec) VALUES (?, ?, ?)",
+            (
+                (hash_, model, np.asarray(vec, dtype=np.float32).tobytes())
+                for hash_, vec in zip(hashes, embeddings)
+            ),
+        )
+        self._conn.commit()
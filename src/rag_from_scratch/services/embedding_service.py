@@ -0,0 +1,267 @@
+import logging
+import os
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import onnxruntime as ort
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+from tokenizers import Tokenizer
+
+from .embedding_cache import EmbeddingCache, hash_text
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DTYPES = {"auto", "float32", "float16", "bfloat16", "int8"}
+
+
+class OnnxEncoder:
+    """Sentence encoder running an exported transformer with ONNX Runtime.
+
+    Expects a tokenizer.json next to the .onnx file, as in the ONNX exports of
+    sentence-transformers models on the Hugging Face Hub. Token embeddings are
+    mean-pooled over the attention mask, matching sentence-transformers.
+
+    Attributes:
+        session (ort.InferenceSession): Optimized inference session
+        tokenizer (Tokenizer): Fast tokenizer loaded from tokenizer.json
+    """
+
+    def __init__(self, model_path: str | Path, max_length: int = 256):
+        model_path = Path(model_path)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        available = ort.get_available_providers()
+        providers = [
+            provider
+            for provider in ("CUDAExecutionProvider", "CPUExecutionProvider")
+            if provider in available
+        ]
+        self.session = ort.InferenceSession(
+            str(model_path), sess_options=options, providers=providers
+        )
+        self._input_names = {node.name for node in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(str(model_path.parent / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.session.get_outputs()[0].shape[-1]
+
+    def encode(
+        self,
+        sentences: list[str],
+        batch_size: int = 32,
+        normalize_embeddings: bool = False,
+        **kwargs,
+    ) -> np.ndarray:
+        """Embed sentences, accepting the keyword arguments of SentenceTransformer"""
+        batches = []
+        for i in range(0, len(sentences), batch_size):
+            encodings = self.tokenizer.encode_batch(sentences[i : i + batch_size])
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array(
+                [e.attention_mask for e in encodings], dtype=np.int64
+            )
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self._input_names:
+                feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+            token_embeddings = self.session.run(None, feeds)[0]
+            embeddings = np.einsum(
+                "bsd,bs->bd", token_embeddings, attention_mask
+            ) / attention_mask.sum(axis=1, keepdims=True)
+            if normalize_embeddings:
+                embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+            batches.append(embeddings.astype(np.float32))
+
+        return np.concatenate(batches)
+
+
+def get_onnx_model_path(model_name: str) -> Path | None:
+    """Return the ONNX file to use for model_name, or None for PyTorch.
+
+    A model name ending in .onnx is used as is. With RAG_USE_ONNX=1 the model
+    name is treated as a directory containing model.onnx.
+    """
+    if model_name.endswith(".onnx"):
+        return Path(model_name)
+    if os.environ.get("RAG_USE_ONNX") == "1":
+        return Path(model_name) / "model.onnx"
+    return None
+
+
+def get_int8_model_path(onnx_path: Path) -> Path:
+    """Return an int8 copy of an ONNX model, quantizing it on first use.
+
+    Weights are quantized to int8 ahead of time and activations dynamically at
+    runtime, so matrix multiplications use the VNNI / dot-product int8 kernels
+    of ONNX Runtime where the CPU has them. The quantized model is written next
+    to the original as <name>.int8.onnx.
+
+    Raises:
+        ImportError: If the onnx package needed for quantization is missing
+    """
+    if onnx_path.stem.endswith(".int8"):
+        return onnx_path
+
+    int8_path = onnx_path.with_name(f"{onnx_path.stem}.int8.onnx")
+    if not int8_path.exists():
+        from onnxruntime.quantization import quantize_dynamic
+
+        quantize_dynamic(onnx_path, int8_path)
+        logger.info(f"Quantized {onnx_path} to {int8_path}")
+    return int8_path
+
+
+@cache
+def load_model(
+    model_name: str, dtype: str = "auto"
+) -> "SentenceTransformer | OnnxEncoder":
+    """Load a sentence transformer model once per process.
+
+    Args:
+        model_name: Name of the sentence transformer model to use, or path to
+            an exported .onnx model to run with ONNX Runtime
+        dtype: Inference precision. "auto" runs float16 on CUDA and float32
+            otherwise; "bfloat16" suits CPUs with native BF16 support. "int8"
+            runs a quantized copy of an ONNX model, falling back to float32 if
+            the model is not ONNX or cannot be quantized. Other values are
+            ignored for ONNX models, which run at the precision they were
+            exported in
+
+    Returns:
+        SentenceTransformer instance cast to the requested precision, or an
+        OnnxEncoder for ONNX models
+    """
+    if dtype not in EMBEDDING_DTYPES:
+        raise ValueError(f"Unsupported embedding dtype: {dtype}")
+
+    onnx_path = get_onnx_model_path(model_name)
+    if dtype == "int8":
+        dtype = "float32"
+        if onnx_path is None:
+            logger.warning("int8 embeddings need an ONNX model, using float32")
+        else:
+            try:
+                onnx_path = get_int8_model_path(onnx_path)
+            except ImportError:
+                logger.warning(
+                    "Install the int8 extra to quantize ONNX models, using float32"
+                )
+
+    if onnx_path is not None:
+        model = OnnxEncoder(onnx_path)
+        logger.info(
+            f"Loaded ONNX embedding model {onnx_path} "
+            f"({', '.join(model.session.get_providers())})"
+        )
+        return model
+
+    # Deferred, as it imports torch, which ONNX models do not need
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name)
+    if dtype == "auto":
+        dtype = "float16" if model.device.type == "cuda" else "float32"
+    if dtype == "float16":
+        model.half()
+    elif dtype == "bfloat16":
+        model.bfloat16()
+
+    logger.info(f"Loaded embedding model {model_name} on {model.device} ({dtype})")
+    return model
+
+
+def encode_texts(
+    texts: list[str],
+    model_name: str,
+    batch_size: int = 64,
+    dtype: str = "auto",
+    show_progress_bar: bool = False,
+    cache: EmbeddingCache | None = None,
+) -> np.ndarray:
+    """Embed texts in length-bucketed batches.
+
+    Texts are sorted by length and split into short, medium and long buckets so
+    each mini-batch pads to a similar length. Short texts are encoded with twice
+    the batch size and long texts with half of it, then the embeddings are put
+    back into the input order. If a cache is given, only texts whose content
+    hash is not already cached for this model are encoded.
+
+    Args:
+        texts: Texts to embed
+        model_name: Name of the sentence transformer model to use
+        batch_size: Number of texts per forward pass for medium-length texts
+        dtype: Inference precision passed to load_model
+        show_progress_bar: Whether to display a progress bar while encoding
+        cache: Persistent embedding cache to read from and write to
+
+    Returns:
+        Array of shape (len(texts), dim) with L2-normalized float32 embeddings
+    """
+    model = load_model(model_name, dtype)
+    embeddings = np.empty(
+        (len(texts), model.get_sentence_embedding_dimension()), dtype=np.float32
+    )
+    if not texts:
+        return embeddings
+
+    if cache is not None:
+        # int8 embeddings differ slightly, so they are cached separately
+        cache_model = f"{model_name}:int8" if dtype == "int8" else model_name
+        hashes = [hash_text(text) for text in texts]
+        cached = cache.get_many(hashes, cache_model)
+        misses = []
+        for i, hash_ in enumerate(hashes):
+            if hash_ in cached:
+                embeddings[i] = cached[hash_]
+            else:
+                misses.append(i)
+        logger.info(
+            f"Embedding cache: {len(texts) - len(misses)} hits, {len(misses)} misses"
+        )
+
+        if misses:
+            embeddings[misses] = encode_texts(
+                [texts[i] for i in misses],
+                model_name,
+                batch_size=batch_size,
+                dtype=dtype,
+                show_progress_bar=show_progress_bar,
+            )
+            cache.put_many([hashes[i] for i in misses], embeddings[misses], cache_model)
+        return embeddings
+
+    order = np.argsort([len(text) for text in texts], kind="stable")
+    bucket_batch_sizes = (batch_size * 2, batch_size, max(batch_size // 2, 1))
+    for bucket, bucket_batch_size in zip(
+        np.array_split(order, len(bucket_batch_sizes)), bucket_batch_sizes
+    ):
+        if not len(bucket):
+            continue
+        embeddings[bucket] = model.encode(
+            [texts[i] for i in bucket],
+            batch_size=bucket_batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=show_progress_bar,
+        )
+
+    return embeddings
+
+
+class SentenceTransformerEmbedder(EmbeddingFunction[Documents]):
+    """Chroma embedding function sharing the cached model used for ingest"""
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", dtype: str = "auto"):
+        self.model_name = model_name
+        self.dtype = dtype
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return list(encode_texts(list(input), self.model_name, dtype=self.dtype))
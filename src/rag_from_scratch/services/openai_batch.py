@@ -0,0 +1,107 @@
+import json
+import logging
+import time
+from functools import cache
+
+from openai import OpenAI
+
+from ..config.config import get_config
+from .openai_service import SYSTEM_MESSAGE
+
+logger = logging.getLogger(__name__)
+
+BATCH_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+@cache
+def get_client() -> OpenAI:
+    """Create the synchronous client on first use; batch jobs are run offline"""
+    return OpenAI(api_key=get_config().openai_api_key)
+
+
+def build_batch_requests(prompts: list[str]) -> list[dict]:
+    """Build one chat completion request per prompt in Batch API format"""
+    cfg = get_config()
+    return [
+        {
+            "custom_id": f"request-{i}",
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": cfg.openai_model,
+                "messages": [SYSTEM_MESSAGE, {"role": "user", "content": prompt}],
+                "temperature": cfg.openai_temperature,
+                "max_tokens": cfg.openai_max_tokens,
+            },
+        }
+        for i, prompt in enumerate(prompts)
+    ]
+
+
+def submit_batch(prompts: list[str]) -> str:
+    """Upload the prompts as a JSONL file and start a batch job.
+
+    Args:
+        prompts: Prompts to complete, each sent with the default system message
+
+    Returns:
+        str: Id of the created batch
+    """
+    jsonl = "".join(
+        json.dumps(request) + "\n" for request in build_batch_requests(prompts)
+    )
+    batch_file = get_client().files.create(
+        file=("batch.jsonl", jsonl.encode("utf-8")), purpose="batch"
+    )
+    batch = get_client().batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    logger.info(f"Submitted batch {batch.id} with {len(prompts)} requests")
+    return batch.id
+
+
+def poll_and_collect(
+    batch_id: str, queries: list[str], poll_interval: float = 60
+) -> dict[str, str]:
+    """Wait for a batch to finish and return its responses.
+
+    Args:
+        batch_id: Id returned by submit_batch
+        queries: Queries in the order their prompts were submitted
+        poll_interval: Seconds to wait between status checks
+
+    Returns:
+        dict[str, str]: Response for each query that completed successfully
+    """
+    batch = get_client().batches.retrieve(batch_id)
+    while batch.status not in BATCH_TERMINAL_STATUSES:
+        logger.info(f"Batch {batch_id} is {batch.status}, waiting...")
+        time.sleep(poll_interval)
+        batch = get_client().batches.retrieve(batch_id)
+
+    if batch.status != "completed":
+        raise RuntimeError(f"Batch {batch_id} ended with status {batch.status}")
+
+    # Failed requests are written to a separate error file, and if every
+    # request failed there is no output file at all
+    if batch.error_file_id is not None:
+        logger.error(f"Batch {batch_id} has failed requests in {batch.error_file_id}")
+    responses = {}
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if file_id is None:
+            continue
+        output = get_client().files.content(file_id).text
+        for line in output.splitlines():
+            result = json.loads(line)
+            query = queries[int(result["custom_id"].removeprefix("request-"))]
+            response = result.get("response") or {}
+            if result.get("error") or response.get("status_code") != 200:
+                error = result.get("error") or response.get("body", {}).get("error")
+                logger.error(f"Batch request failed for {query!r}: {error}")
+                continue
+            responses[query] = response["body"]["choices"][0]["message"]["content"]
+
+    logger.info(f"Collected {len(responses)} of {len(queries)} batch responses")
+    return responses
@@ -1,23 +1,38 @@
 import logging
+from collections.abc import Callable
+from functools import cache
 
-from openai import APIError, APITimeoutError, OpenAI, RateLimitError
+from openai import APIError, APITimeoutError, AsyncOpenAI, RateLimitError
 
-from ..config.config import (
-    OPENAI_API_KEY,
-    OPENAI_MAX_TOKENS,
-    OPENAI_MODEL,
-    OPENAI_TEMPERATURE,
-)
+from ..config.config import get_config
+from .response_cache import ResponseCache
 
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY)
 
+class ResponseGenerationError(Exception):
+    """A response could not be generated; the message is fit to show the user"""
 
-def get_prompt(context: str, query: str):
-    """Generate a prompt combining context and query"""
-    prompt = f"""Based on the following context, please provide a relevant 
+    pass
+
+
+@cache
+def get_client() -> AsyncOpenAI:
+    """Create the OpenAI client on first use"""
+    return AsyncOpenAI(api_key=get_config().openai_api_key)
+
+
+@cache
+def get_response_cache() -> ResponseCache | None:
+    """Open the cache of previous responses, if enabled in the config"""
+    cfg = get_config()
+    if not cfg.llm_cache_enabled:
+        return None
+    return ResponseCache(path=cfg.llm_cache_path, ttl=cfg.llm_cache_ttl)
+
+
+# Prompt templates, filled in with str.format_map
+PROMPT_TEMPLATE = """Based on the following context, please provide a relevant 
     and contextual response. If the answer cannot be derived from the context, 
     only say "I cannot answer this based on the provided information."
 
@@ -28,12 +43,7 @@ def get_prompt(context: str, query: str):
 
     Assistant:"""
 
-    return prompt
-
-
-def get_prompt_with_history(context: str, conversation_history: str, query: str):
-    """Generate a prompt combining context, history, and query"""
-    prompt = f"""Based on the following context and conversation history, 
+PROMPT_WITH_HISTORY_TEMPLATE = """Based on the following context and conversation history, 
     please provide a relevant and contextual response. If the answer cannot 
     be derived from the context, only use the conversation history or say 
     "I cannot answer this based on the provided information."
@@ -48,74 +58,148 @@ def get_prompt_with_history(context: str, conversation_history: str, query: str)
 
     Assistant:"""
 
-    return prompt
+SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are a helpful assistant that answers questions based on the provided context.",
+}
+
+CONTEXTUALIZE_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": """Given a chat history and the latest user question 
+    which might reference context in the chat history, formulate a standalone 
+    question which can be understood without the chat history. Do NOT answer 
+    the question, just reformulate it if needed and otherwise return it as is.""",
+}
+
+
+async def request_completion(
+    messages: list[dict], on_token: Callable[[str], None] | None = None, **params
+) -> str:
+    """Request a completion, streaming its tokens to on_token if given"""
+    if on_token is None:
+        completion = await get_client().chat.completions.create(
+            messages=messages, **params
+        )
+        return completion.choices[0].message.content
+
+    parts = []
+    stream = await get_client().chat.completions.create(
+        messages=messages, stream=True, **params
+    )
+    async for chunk in stream:
+        if chunk.choices and (token := chunk.choices[0].delta.content):
+            parts.append(token)
+            on_token(token)
+    return "".join(parts)
 
 
-def generate_response(
-    query: str, context: str, conversation_history: str | None = None
+async def create_chat_completion(
+    messages: list[dict], on_token: Callable[[str], None] | None = None, **params
 ) -> str:
-    """Generate a response using OpenAI"""
+    """Return the completion text for the messages, using the cache if enabled.
+
+    Args:
+        messages: Chat messages to complete
+        on_token: Called with each piece of the response as it arrives. A
+            cached response is passed in one piece
+        **params: Other chat completion parameters (model, temperature, ...)
+    """
+    response_cache = get_response_cache()
+    if response_cache is None:
+        return await request_completion(messages, on_token, **params)
+
+    key = ResponseCache.make_key(messages=messages, **params)
+    content = response_cache.get(key)
+    if content is None:
+        content = await request_completion(messages, on_token, **params)
+        # Errors raise before this point; empty completions are not kept either
+        if content:
+            response_cache.put(key, content)
+    elif on_token is not None:
+        on_token(content)
+    return content
+
+
+def get_prompt(context: str, query: str):
+    """Generate a prompt combining context and query"""
+    return PROMPT_TEMPLATE.format_map({"context": context, "query": query})
+
+
+def get_prompt_with_history(context: str, conversation_history: str, query: str):
+    """Generate a prompt combining context, history, and query"""
+    return PROMPT_WITH_HISTORY_TEMPLATE.format_map(
+        {
+            "context": context,
+            "conversation_history": conversation_history,
+            "query": query,
+        }
+    )
+
+
+async def generate_response(
+    query: str,
+    context: str,
+    conversation_history: str | None = None,
+    on_token: Callable[[str], None] | None = None,
+) -> str:
+    """Generate a response using OpenAI, streaming it to on_token if given.
+
+    Raises:
+        ResponseGenerationError: If the API request fails
+    """
     if conversation_history is None:
         prompt = get_prompt(context, query)
     else:
         prompt = get_prompt_with_history(context, conversation_history, query)
 
+    cfg = get_config()
     try:
-        response = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a helpful assistant that answers questions based on the provided context.",
-                },
-                {"role": "user", "content": prompt},
-            ],
-            temperature=OPENAI_TEMPERATURE,
-            max_tokens=OPENAI_MAX_TOKENS,
+        return await create_chat_completion(
+            model=cfg.openai_model,
+            messages=[SYSTEM_MESSAGE, {"role": "user", "content": prompt}],
+            temperature=cfg.openai_temperature,
+            max_tokens=cfg.openai_max_tokens,
+            on_token=on_token,
         )
-        return response.choices[0].message.content
     except RateLimitError as e:
         error_msg = "Rate limit exceeded. Please try again later."
         logger.error(f"{error_msg}: {str(e)}")
-        return error_msg
+        raise ResponseGenerationError(error_msg) from e
     except APITimeoutError as e:
         error_msg = "Request timed out. Please try again."
         logger.error(f"{error_msg}: {str(e)}")
-        return error_msg
+        raise ResponseGenerationError(error_msg) from e
     except APIError as e:
         error_msg = "API error occurred. Please try again later."
         logger.error(f"{error_msg}: {str(e)}")
-        return error_msg
+        raise ResponseGenerationError(error_msg) from e
 
 
-def contextualize_query(query: str, conversation_history: str):
-    """Convert follow-up questions into standalone queries"""
-    contextualize_prompt = """Given a chat history and the latest user question 
-    which might reference context in the chat history, formulate a standalone 
-    question which can be understood without the chat history. Do NOT answer 
-    the question, just reformulate it if needed and otherwise return it as is."""
+async def contextualize_query(query: str, conversation_history: str):
+    """Convert follow-up questions into standalone queries.
 
+    Falls back to the query as given if the API request fails.
+    """
     try:
-        completion = client.chat.completions.create(
-            model=OPENAI_MODEL,
+        return await create_chat_completion(
+            model=get_config().openai_model,
             messages=[
-                {"role": "system", "content": contextualize_prompt},
+                CONTEXTUALIZE_SYSTEM_MESSAGE,
                 {
                     "role": "user",
                     "content": f"Chat history:\n{conversation_history}\n\nQuestion:\n{query}",
                 },
             ],
         )
-        return completion.choices[0].message.content
     except RateLimitError as e:
         error_msg = "Rate limit exceeded. Please try again later."
         logger.error(f"{error_msg}: {str(e)}")
-        return error_msg
+        return query
     except APITimeoutError as e:
         error_msg = "Request timed out. Please try again."
         logger.error(f"{error_msg}: {str(e)}")
-        return error_msg
+        return query
     except APIError as e:
         error_msg = "API error occurred. Please try again later."
         logger.error(f"{error_msg}: {str(e)}")
-        return error_msg
+        return query
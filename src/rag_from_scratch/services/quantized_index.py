@@ -0,0 +1,153 @@
+import logging
+from pathlib import Path
+
+import numpy as np
+from chromadb.api.models.Collection import Collection
+
+from .embedding_service import encode_texts
+
+try:
+    # Optional: SIMD distance kernels picked at runtime for the host CPU
+    import simsimd
+except ImportError:
+    simsimd = None
+
+logger = logging.getLogger(__name__)
+
+# Above this many vectors the HNSW index beats a brute-force scan
+MAX_BRUTE_FORCE_SIZE = 1_000_000
+
+# Rows converted to float32 at a time by the NumPy scan, so each temporary
+# block stays a few MB instead of a float32 copy of the whole index
+SCAN_BLOCK_ROWS = 4096
+
+
+def get_kernel_name() -> str:
+    """Describe the distance kernel used for quantized search"""
+    if simsimd is None:
+        return "numpy"
+    capabilities = [name for name, on in simsimd.get_capabilities().items() if on]
+    return f"simsimd ({', '.join(capabilities)})"
+
+
+def quantize_int8(embeddings: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Scalar-quantize float embeddings to int8 with one scale per vector.
+
+    Args:
+        embeddings: Array of shape (n, dim)
+
+    Returns:
+        Tuple of the int8 array of shape (n, dim) and float32 scales of shape (n,)
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    scales = np.abs(embeddings).max(axis=1) / 127
+    scales[scales == 0] = 1.0
+    quantized = np.round(embeddings / scales[:, None]).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+class QuantizedIndex:
+    """Brute-force int8 vector index kept alongside a Chroma collection.
+
+    Stores one byte per dimension instead of four. With SimSIMD installed the
+    int8 vectors are scanned directly; the NumPy fallback converts them to
+    float32 in blocks of SCAN_BLOCK_ROWS rows. The vectors are persisted to a
+    .npz sidecar file next to the Chroma database by save(), which callers
+    invoke once after adding or removing vectors.
+
+    Attributes:
+        path (Path): Location of the .npz sidecar file
+        model_name (str): Embedding model used to embed queries
+        dtype (str): Inference precision of the embedding model
+    """
+
+    def __init__(self, path: str | Path, model_name: str, dtype: str = "auto"):
+        self.path = Path(path)
+        self.model_name = model_name
+        self.dtype = dtype
+        self._ids: list[str] = []
+        self._vectors: np.ndarray | None = None
+        self._scales = np.empty(0, dtype=np.float32)
+        if self.path.exists():
+            self._load()
+        logger.info(f"Quantized search kernel: {get_kernel_name()}")
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _load(self) -> None:
+        """Load quantized vectors from the sidecar file"""
+        with np.load(self.path) as data:
+            self._ids = data["ids"].tolist()
+            self._vectors = data["vectors"]
+            self._scales = data["scales"]
+        logger.info(f"Loaded {len(self)} quantized vectors from {self.path}")
+
+    def save(self) -> None:
+        """Write quantized vectors to the sidecar file"""
+        if self._vectors is None:
+            return
+        np.savez(
+            self.path,
+            ids=np.array(self._ids),
+            vectors=self._vectors,
+            scales=self._scales,
+        )
+
+    def add(self, ids: list[str], embeddings: np.ndarray) -> None:
+        """Quantize and append embeddings; call save() to persist them"""
+        if not ids:
+            return
+        vectors, scales = quantize_int8(embeddings)
+        if self._vectors is None:
+            self._vectors = vectors
+        else:
+            self._vectors = np.concatenate([self._vectors, vectors])
+        self._scales = np.concatenate([self._scales, scales])
+        self._ids.extend(ids)
+
+    def remove(self, ids: list[str]) -> None:
+        """Drop the vectors with the given ids; call save() to persist them"""
+        drop = set(ids)
+        keep = [i for i, id_ in enumerate(self._ids) if id_ not in drop]
+        if len(keep) == len(self._ids):
+            return
+        self._ids = [self._ids[i] for i in keep]
+        self._vectors = self._vectors[keep]
+        self._scales = self._scales[keep]
+
+    def sync(self, collection: Collection) -> None:
+        """Rebuild the index from the collection if they have drifted apart"""
+        if len(self) == collection.count():
+            return
+
+        logger.info(f"Rebuilding quantized index from collection {collection.name}")
+        results = collection.get(include=["embeddings"])
+        self._ids, self._vectors = [], None
+        self._scales = np.empty(0, dtype=np.float32)
+        self.add(results["ids"], results["embeddings"])
+        self.save()
+
+    def search(self, query: str, n_results: int) -> tuple[list[str], list[float]]:
+        """Return ids and cosine distances of the nearest vectors"""
+        if not len(self):
+            return [], []
+
+        query_embedding = encode_texts([query], self.model_name, dtype=self.dtype)
+        if simsimd is not None:
+            # Cosine is scale-invariant, so the int8 vectors are compared as is
+            query_vector, _ = quantize_int8(query_embedding)
+            distances = np.asarray(
+                simsimd.cdist(query_vector, self._vectors, metric="cosine")
+            )[0]
+        else:
+            similarities = np.empty(len(self), dtype=np.float32)
+            for start in range(0, len(self), SCAN_BLOCK_ROWS):
+                block = self._vectors[start : start + SCAN_BLOCK_ROWS]
+                similarities[start : start + len(block)] = block @ query_embedding[0]
+            distances = 1.0 - similarities * self._scales
+
+        n_results = min(n_results, len(self))
+        top = np.argpartition(distances, n_results - 1)[:n_results]
+        top = top[np.argsort(distances[top])]
+        return [self._ids[i] for i in top], distances[top].tolist()
@@ -0,0 +1,71 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """SQLite-backed cache of LLM responses keyed by the full request.
+
+    Attributes:
+        path (Path): Location of the SQLite database file
+        ttl (float): Seconds before an entry expires; 0 keeps entries forever
+    """
+
+    def __init__(self, path: str | Path, ttl: float = 0):
+        self.path = Path(path)
+        self.ttl = ttl
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self.prune()
+
+    @staticmethod
+    def make_key(**request) -> str:
+        """Hash the request parameters (messages, model, temperature, ...)"""
+        payload = json.dumps(request, sort_keys=True).encode("utf-8")
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        """Return the cached response, or None if missing or expired"""
+        row = self._conn.execute(
+            "SELECT response, created FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        response, created = row
+        if self.ttl and time.time() - created > self.ttl:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.commit()
+            return None
+
+        logger.info("LLM response cache hit")
+        return response
+
+    def put(self, key: str, response: str) -> None:
+        """Store a response, replacing any previous entry for the key"""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses (key, response, created) VALUES (?, ?, ?)",
+            (key, response, time.time()),
+        )
+        self._conn.commit()
+
+    def prune(self) -> int:
+        """Delete expired entries and return how many were removed"""
+        if not self.ttl:
+            return 0
+        deleted = self._conn.execute(
+            "DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,)
+        ).rowcount
+        self._conn.commit()
+        if deleted:
+            logger.info(f"Pruned {deleted} expired LLM responses")
+        return deleted
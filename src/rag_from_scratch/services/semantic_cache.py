@@ -0,0 +1,92 @@
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+
+from chromadb.api.models.Collection import Collection
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """Answer cache that matches paraphrased queries by embedding distance.
+
+    Each entry stores a query as the document, with the response and its
+    sources in the metadata. A new query reuses the stored answer when its
+    nearest cached query is within max_distance. Queries seen in this process
+    are also kept in memory, so exact repeats skip the embedding lookup.
+
+    Attributes:
+        collection (Collection): Chroma collection holding the cached answers
+        max_distance (float): Largest inner-product distance counted as a hit
+        ttl (float): Seconds before an entry expires; 0 keeps entries forever
+        max_exact (int): Number of exact-match entries kept in memory
+    """
+
+    def __init__(
+        self,
+        collection: Collection,
+        max_distance: float = 0.05,
+        ttl: float = 0,
+        max_exact: int = 256,
+    ):
+        self.collection = collection
+        self.max_distance = max_distance
+        self.ttl = ttl
+        self.max_exact = max_exact
+        self._exact: OrderedDict[str, tuple[str, list[str]]] = OrderedDict()
+        if ttl:
+            self.prune()
+
+    def prune(self) -> None:
+        """Delete entries older than the TTL"""
+        cutoff = time.time() - self.ttl
+        expired = self.collection.get(where={"created": {"$lt": cutoff}}, include=[])
+        if expired["ids"]:
+            self.collection.delete(ids=expired["ids"])
+            logger.info(f"Pruned {len(expired['ids'])} expired semantic cache entries")
+
+    def _remember(self, query: str, entry: tuple[str, list[str]]) -> None:
+        """Add an exact-match entry, evicting the least recently used"""
+        self._exact[query] = entry
+        self._exact.move_to_end(query)
+        if len(self._exact) > self.max_exact:
+            self._exact.popitem(last=False)
+
+    def lookup(self, query: str) -> tuple[str, list[str]] | None:
+        """Return the cached response and sources for a similar query"""
+        if query in self._exact:
+            self._exact.move_to_end(query)
+            logger.info("Semantic cache exact hit")
+            return self._exact[query]
+
+        if self.collection.count() == 0:
+            return None
+
+        results = self.collection.query(
+            query_texts=[query], n_results=1, include=["metadatas", "distances"]
+        )
+        if results["distances"][0][0] > self.max_distance:
+            return None
+
+        metadata = results["metadatas"][0][0]
+        logger.info(f"Semantic cache hit (dist {results['distances'][0][0]:.4f})")
+        entry = metadata["response"], json.loads(metadata["sources"])
+        self._remember(query, entry)
+        return entry
+
+    def store(self, query: str, response: str, sources: list[str]) -> None:
+        """Cache the response and sources for a query"""
+        self.collection.add(
+            ids=[str(uuid.uuid4())],
+            documents=[query],
+            metadatas=[
+                {
+                    "response": response,
+                    "sources": json.dumps(sources),
+                    "created": time.time(),
+                }
+            ],
+        )
+        self._remember(query, (response, sources))
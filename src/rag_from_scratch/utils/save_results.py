@@ -1,58 +1,233 @@
-import csv
+import atexit
 import logging
+import queue
+import re
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Iterable
+from itertools import islice
 from pathlib import Path
+from typing import Self
 
 logger = logging.getLogger(__name__)
 
+HEADER = ["Query", "Response", "Sources"]
 
-def save_rag_results(filepath: Path | str, results: dict) -> None:
-    """Save RAG query results to a CSV file.
+# Size of the write buffer, so rows reach the disk in large blocks
+BUFFER_SIZE = 1 << 20
+
+# Characters that make a field need quoting, as with csv.QUOTE_MINIMAL
+_NEEDS_QUOTE = re.compile(r'[",\r\n]')
+
+
+def format_field(field: object) -> str:
+    """Quote a CSV field if it contains a delimiter, quote or line break.
+
+    Like csv.writer, None is written as an empty field and other values as
+    their str(), e.g. for a completion whose content is None.
+    """
+    field = "" if field is None else str(field)
+    if _NEEDS_QUOTE.search(field):
+        return '"' + field.replace('"', '""') + '"'
+    return field
+
+
+def format_row(query: object, response: object, sources: object) -> bytes:
+    """Format a row of the fixed three-column schema as a UTF-8 CSV line.
+
+    The output matches csv.writer with the default excel dialect.
+    """
+    return (
+        f"{format_field(query)},{format_field(response)},{format_field(sources)}\r\n"
+    ).encode()
+
+
+class RagResultsWriter:
+    """CSV writer for RAG query results, kept open for a whole session.
+
+    Rows are formatted directly to bytes for the fixed Query, Response, Sources
+    schema, buffered in memory and written in blocks of BUFFER_SIZE bytes. The
+    header is written only when the file is empty, so appending to an existing
+    results file does not repeat it. Use as a context manager so the file is
+    flushed and closed at the end of the session.
+
+    Attributes:
+        filepath (Path): CSV file the results are appended to
+    """
+
+    def __init__(self, filepath: Path | str):
+        self.filepath = Path(filepath)
+        self._file = self.filepath.open("ab", buffering=BUFFER_SIZE)
+        # Append mode opens at the end of the file, so an empty file is at 0
+        if self._file.tell() == 0:
+            self._file.write(format_row(*HEADER))
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def append(self, query: str, response: str, sources: Iterable[str]) -> None:
+        """Write one result row, with the sources one per line"""
+        self._file.write(format_row(query, response, "\n".join(sources)))
+
+    def extend(self, results: Iterable[dict], batch_size: int = 512) -> None:
+        """Write result rows, joined into one write per batch_size rows.
+
+        Args:
+            results: Results with "query", "response" and "sources" keys
+            batch_size: Number of rows joined into each write
+        """
+        rows = (
+            format_row(
+                result["query"], result["response"], "\n".join(result["sources"])
+            )
+            for result in results
+        )
+        while batch := list(islice(rows, batch_size)):
+            self._file.write(b"".join(batch))
+
+    def flush(self) -> None:
+        """Write the buffered rows to the file"""
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+# Writers reused by save_rag_results_batch, keyed by resolved file path
+_writers: dict[Path, RagResultsWriter] = {}
+
+
+@atexit.register
+def close_writers() -> None:
+    """Close the writers opened by save_rag_results_batch"""
+    while _writers:
+        _writers.popitem()[1].close()
+
+
+def save_rag_results_batch(
+    filepath: Path | str, results: Iterable[dict], batch_size: int = 512
+) -> None:
+    """Save the results of many RAG queries to a CSV file.
+
+    The file is opened on the first call and kept open until the interpreter
+    exits; each call flushes its rows. Use RagResultsWriter to control when the
+    file is closed.
 
     Args:
         filepath: File path to save
-        results: Dictionary containing:
-            - query: The search query
-            - response: The OpenAI response
-            - sources: Sources, chunks and distances
+        results: Results with "query", "response" and "sources" keys, the
+            sources being written one per line
+        batch_size: Number of rows joined into each write
     """
     try:
-        # Convert filepath to Path object if it's a string
-        filepath = Path(filepath) if isinstance(filepath, str) else filepath
-
-        # Check if the file exists
-        write_header = not filepath.exists()
-
-        # Open the file in append mode
-        with filepath.open("a", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-
-            # Write header only if the file doesn't exist
-            if write_header:
-                writer.writerow(["Query", "Response", "Sources"])
-
-            # Write results
-            writer.writerow(
-                [
-                    results["query"],
-                    results["response"],
-                    results["sources"],
-                ]
-            )
+        key = Path(filepath).resolve()
+        writer = _writers.get(key)
+        if writer is None:
+            writer = _writers[key] = RagResultsWriter(filepath)
+        writer.extend(results, batch_size=batch_size)
+        writer.flush()
 
         logger.info(f"RAG results saved to {filepath}")
 
-    except FileNotFoundError as e:
-        logger.error(f"File not found: {e}")
-        raise
-    except PermissionError as e:
-        logger.error(f"Permission denied: {e}")
-        raise
-    except OSError as e:
-        logger.error(f"OS error occurred: {e}")
-        raise
-    except csv.Error as e:
-        logger.error(f"CSV writing error: {e}")
-        raise
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+    except (OSError, ValueError):
+        # OSError covers missing paths and permissions; ValueError covers text
+        # that cannot be encoded and writes to a closed file
+        logger.exception(f"Failed to save RAG results to {filepath}")
         raise
+
+
+# Rows queued by save_rag_results, written by a background thread
+_queue: queue.Queue[tuple[Path, dict] | None] = queue.Queue(maxsize=4096)
+_queue_lock = threading.Lock()
+_queue_thread: threading.Thread | None = None
+
+# Rows are written once this many are queued or the oldest has waited this long
+QUEUE_BATCH_SIZE = 512
+QUEUE_MAX_DELAY = 0.1
+
+
+def write_queued_results() -> None:
+    """Write queued results in batches until the None sentinel is received"""
+    stopping = False
+    while not stopping:
+        item = _queue.get()
+        if item is None:
+            _queue.task_done()
+            break
+
+        batch = [item]
+        deadline = time.monotonic() + QUEUE_MAX_DELAY
+        while len(batch) < QUEUE_BATCH_SIZE:
+            try:
+                item = _queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if item is None:
+                stopping = True
+                _queue.task_done()
+                break
+            batch.append(item)
+
+        try:
+            results_by_file = defaultdict(list)
+            for filepath, result in batch:
+                results_by_file[filepath].append(result)
+            for filepath, results in results_by_file.items():
+                try:
+                    save_rag_results_batch(filepath, results)
+                except (OSError, ValueError):
+                    pass  # Already logged; keep writing the other files
+                except Exception:
+                    logger.exception(f"Unexpected error saving results to {filepath}")
+        finally:
+            # Marked done even on failure, so wait_for_results cannot hang
+            for _ in batch:
+                _queue.task_done()
+
+
+def wait_for_results() -> None:
+    """Block until every result queued by save_rag_results is written"""
+    _queue.join()
+
+
+@atexit.register
+def stop_results_queue() -> None:
+    """Write the remaining queued results and stop the background thread.
+
+    Registered after close_writers, so it runs before the writers are closed.
+    """
+    if _queue_thread is not None and _queue_thread.is_alive():
+        _queue.put(None)
+        _queue_thread.join()
+
+
+def save_rag_results(
+    filepath: Path | str, query: str, response: str, sources: Iterable[str]
+) -> None:
+    """Queue RAG query results to be saved to a CSV file.
+
+    Returns without waiting for the disk: a background thread writes queued
+    rows in batches, and only blocks the caller if 4096 rows are waiting.
+    Errors are logged by that thread. Call wait_for_results to make sure the
+    rows have been written.
+
+    Args:
+        filepath: File path to save
+        query: The search query
+        response: The OpenAI response
+        sources: Sources, chunks and distances, written one per line
+    """
+    global _queue_thread
+    with _queue_lock:
+        if _queue_thread is None or not _queue_thread.is_alive():
+            _queue_thread = threading.Thread(
+                target=write_queued_results, name="rag-results-writer", daemon=True
+            )
+            _queue_thread.start()
+
+    result = {"query": query, "response": response, "sources": list(sources)}
+    _queue.put((Path(filepath), result))
@@ -1,4 +1,3 @@
-import tempfile
 from pathlib import Path
 
 import docx
@@ -6,58 +5,64 @@ import pypdf
 import pytest
 
 from rag_from_scratch.core.document_processing import (
+    DocumentProcessingError,
     DocumentReaderFactory,
     DocxReader,
     PDFReader,
     TextReader,
+    process_document,
+    read_documents,
 )
 
 
-@pytest.fixture
-def text_file():
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".txt") as tmp:
-        tmp.write(b"Hello, this is a text file.")
-        tmp_path = tmp.name
-    yield tmp_path
-    Path(tmp_path).unlink()
+@pytest.fixture(scope="session")
+def docs_dir(tmp_path_factory):
+    return tmp_path_factory.mktemp("docs")
 
 
-@pytest.fixture
-def pdf_file():
+@pytest.fixture(scope="session")
+def text_file(docs_dir):
+    path = docs_dir / "sample.txt"
+    path.write_bytes(b"Hello, this is a text file.")
+    return str(path)
+
+
+@pytest.fixture(scope="session")
+def pdf_file(docs_dir):
     pdf = pypdf.PdfWriter()
     pdf.add_blank_page(72, 72)
-    pdf.write
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        pdf.write(tmp)
-        tmp_path = tmp.name
-    yield tmp_path
-    Path(tmp_path).unlink()
+    path = docs_dir / "sample.pdf"
+    with open(path, "wb") as f:
+        pdf.write(f)
+    return str(path)
 
 
-@pytest.fixture
-def docx_file():
+@pytest.fixture(scope="session")
+def docx_file(docs_dir):
     doc = docx.Document()
     doc.add_paragraph("Hello, this is a Word document.")
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tmp:
-        doc.save(tmp.name)
-        tmp_path = tmp.name
-    yield tmp_path
-    Path(tmp_path).unlink()
+    path = docs_dir / "sample.docx"
+    doc.save(path)
+    return str(path)
 
 
-def test_factory_text_reader(text_file):
-    reader = DocumentReaderFactory.get_reader(file_path=text_file)
-    assert isinstance(reader, TextReader)
+DOCUMENTS = [
+    ("text_file", TextReader, "Hello, this is a text file."),
+    ("pdf_file", PDFReader, "\n"),
+    ("docx_file", DocxReader, "Hello, this is a Word document."),
+]
 
 
-def test_factory_pdf_reader(pdf_file):
-    reader = DocumentReaderFactory.get_reader(file_path=pdf_file)
-    assert isinstance(reader, PDFReader)
+@pytest.mark.parametrize("fixture_name, reader_cls, _", DOCUMENTS)
+def test_factory_reader(request, fixture_name, reader_cls, _):
+    file_path = request.getfixturevalue(fixture_name)
+    reader = DocumentReaderFactory.get_reader(file_path=file_path)
+    assert isinstance(reader, reader_cls)
 
 
-def test_factory_docx_reader(docx_file):
-    reader = DocumentReaderFactory.get_reader(file_path=docx_file)
-    assert isinstance(reader, DocxReader)
+def test_factory_reuses_readers(text_file):
+    reader = DocumentReaderFactory.get_reader(file_path=text_file)
+    assert DocumentReaderFactory.get_reader("other.TXT") is reader
 
 
 def test_factory_unsupported_format():
@@ -65,23 +70,34 @@ def test_factory_unsupported_format():
         DocumentReaderFactory.get_reader("test.unsupported")
 
 
-def test_text_reader(text_file):
-    reader = TextReader()
-    content = reader.read(text_file)
-    assert content == "Hello, this is a text file."
+@pytest.mark.parametrize("fixture_name, reader_cls, expected", DOCUMENTS)
+def test_reader(request, fixture_name, reader_cls, expected):
+    file_path = request.getfixturevalue(fixture_name)
+    assert reader_cls().read(file_path) == expected
+    assert DocumentReaderFactory.read_document(file_path) == expected
 
 
-def test_docx_reader(docx_file):
-    reader = DocxReader()
-    content = reader.read(docx_file)
-    assert content == "Hello, this is a Word document."
+def test_read_documents(text_file, pdf_file, docx_file):
+    contents = read_documents([docx_file, text_file, pdf_file], num_workers=2)
+    assert contents == [
+        "Hello, this is a Word document.",
+        "Hello, this is a text file.",
+        "\n",
+    ]
 
 
-def test_read_document_text(text_file):
-    content = DocumentReaderFactory.read_document(text_file)
-    assert content == "Hello, this is a text file."
+def test_process_document(text_file):
+    batch = process_document(text_file)
+    name = Path(text_file).name
+    assert batch.source == name
+    assert batch.texts == ["Hello, this is a text file."]
+    assert batch.ids() == [f"{name}_chunk_0"]
+    assert batch.modified == Path(text_file).stat().st_mtime_ns
+    assert batch.metadatas() == [
+        {"source": name, "chunk": 0, "modified": batch.modified}
+    ]
 
 
-def test_read_document_docx(docx_file):
-    content = DocumentReaderFactory.read_document(docx_file)
-    assert content == "Hello, this is a Word document."
+def test_process_document_missing_file():
+    with pytest.raises(DocumentProcessingError, match="File not found"):
+        process_document("missing.txt")
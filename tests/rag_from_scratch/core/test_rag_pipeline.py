@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from rag_from_scratch.core import rag_pipeline
+from rag_from_scratch.core.rag_pipeline import (
+    ConversationManager,
+    conversational_rag_query,
+)
+from rag_from_scratch.services.openai_service import ResponseGenerationError
+
+SEARCH_RESULTS = {
+    "ids": [["a"]],
+    "documents": [["Some context"]],
+    "metadatas": [[{"source": "a.txt", "chunk": 0}]],
+    "distances": [[0.1]],
+}
+
+
+class FakeSemanticCache:
+    def __init__(self):
+        self.stored = []
+
+    def lookup(self, query):
+        return None
+
+    def store(self, query, response, sources):
+        self.stored.append((query, response, sources))
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    async def contextualize_query(query, conversation_history):
+        return query
+
+    monkeypatch.setattr(rag_pipeline, "contextualize_query", contextualize_query)
+    monkeypatch.setattr(rag_pipeline, "semantic_search", lambda **_: SEARCH_RESULTS)
+
+
+def run_query(semantic_cache):
+    manager = ConversationManager()
+    session_id = manager.create_session()
+    response, _, _ = asyncio.run(
+        conversational_rag_query(
+            manager, None, "What is RAG?", session_id, 1, semantic_cache=semantic_cache
+        )
+    )
+    return response
+
+
+def test_response_is_cached(pipeline, monkeypatch):
+    async def generate_response(**_):
+        return "An answer"
+
+    monkeypatch.setattr(rag_pipeline, "generate_response", generate_response)
+    semantic_cache = FakeSemanticCache()
+    assert run_query(semantic_cache) == "An answer"
+    assert semantic_cache.stored == [
+        ("What is RAG?", "An answer", ["a.txt (chunk 0, dist 0.1000)"])
+    ]
+
+
+def test_failed_response_is_not_cached(pipeline, monkeypatch):
+    async def generate_response(**_):
+        raise ResponseGenerationError("Request timed out. Please try again.")
+
+    monkeypatch.setattr(rag_pipeline, "generate_response", generate_response)
+    semantic_cache = FakeSemanticCache()
+    assert run_query(semantic_cache) == "Request timed out. Please try again."
+    assert semantic_cache.stored == []
+
+
+def test_conversation_history_is_bounded():
+    manager = ConversationManager(max_messages=3)
+    session_id = manager.create_session()
+    for i in range(5):
+        manager.add_message(session_id, "user", f"message {i}")
+
+    history = manager.get_conversation_history(session_id)
+    assert [msg["content"] for msg in history] == [
+        "message 2",
+        "message 3",
+        "message 4",
+    ]
+    assert manager.get_conversation_history("unknown") == []
+
+
+def test_add_message_refreshes_formatted_history():
+    manager = ConversationManager()
+    session_id = manager.create_session()
+    assert manager.format_history_for_prompt(session_id) == ""
+
+    manager.add_message(session_id, "user", "What is RAG?")
+    assert manager.format_history_for_prompt(session_id) == "Human: What is RAG?"
+
+    manager.add_message(session_id, "assistant", "Retrieval-augmented generation.")
+    assert manager.format_history_for_prompt(session_id) == (
+        "Human: What is RAG?\n\nAssistant: Retrieval-augmented generation."
+    )
@@ -1,5 +1,7 @@
 from rag_from_scratch.core.text_splitter import (
     create_chunks,
+    is_abbreviation_end,
+    iter_sentences,
     normalize_whitespace,
     reconstruct_sentences,
     split_into_potential_sentences,
@@ -15,6 +17,8 @@ def test_normalize_whitespace():
         == " Multiple leading and trailing spaces "
     )
     assert normalize_whitespace("") == ""
+    assert normalize_whitespace("\t\n  ") == " "
+    assert normalize_whitespace("Line one.\n\tLine two.") == "Line one. Line two."
 
 
 def test_split_into_potential_sentences():
@@ -39,6 +43,16 @@ def test_split_into_potential_sentences():
     assert split_into_potential_sentences("") == [""]
 
 
+def test_is_abbreviation_end():
+    abbreviations = {"mr.", "dr.", "e.g.", "u.s.a."}
+    assert is_abbreviation_end("Hello Dr.", abbreviations)
+    assert is_abbreviation_end("made in the U.S.A.", abbreviations)
+    assert is_abbreviation_end("fruit, e.g.", abbreviations)
+    assert not is_abbreviation_end("Hello world.", abbreviations)
+    assert not is_abbreviation_end("Mr", abbreviations)
+    assert not is_abbreviation_end("Hello Dr.", set())
+
+
 def test_reconstruct_sentences():
     abbreviations = {"mr.", "dr.", "etc.", "e.g."}
 
@@ -85,6 +99,34 @@ def test_reconstruct_sentences():
     assert reconstruct_sentences(potential_sentences, abbreviations) == []
 
 
+def test_iter_sentences():
+    abbreviations = {"mr.", "dr.", "etc.", "e.g."}
+    text = "Hello Dr. Smith! How are you? Fruit, e.g. Apples. Done"
+    assert list(iter_sentences(text, abbreviations)) == [
+        "Hello Dr. Smith!",
+        "How are you?",
+        "Fruit, e.g. Apples.",
+        "Done",
+    ]
+    assert list(iter_sentences("Ends with Mr.", abbreviations)) == ["Ends with Mr."]
+    assert list(iter_sentences("", abbreviations)) == []
+
+
+def test_iter_sentences_matches_reconstruct_sentences():
+    texts = [
+        "Ask Dr . Smith. He knows.",
+        "See the U.K. Then stop",
+        "Met MR. Jones. Then Mr. Brown",
+        "Odd \u212a. Kelvin sign. Done.",
+    ]
+    for abbreviations in ({"mr.", "dr.", "u.k.", "k."}, {"A B."}, set()):
+        for text in texts:
+            expected = reconstruct_sentences(
+                split_into_potential_sentences(text), abbreviations
+            )
+            assert list(iter_sentences(text, abbreviations)) == expected
+
+
 # Test create_chunks
 def test_create_chunks_basic():
     sentences = [
@@ -128,3 +170,14 @@ def test_create_chunks_empty_sentences():
         "Another sentence.",
     ]
     assert create_chunks(sentences, chunk_size) == expected_output
+
+
+def test_create_chunks_length_function():
+    def word_count(text):
+        return len(text.split())
+
+    sentences = ["One two three.", "Four five.", "Six."]
+    assert create_chunks(sentences, 5, word_count) == [
+        "One two three.",
+        "Four five. Six.",
+    ]
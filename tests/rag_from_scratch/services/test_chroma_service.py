@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+import pytest
+
+from rag_from_scratch.services import chroma_service, embedding_service
+
+
+class StubModel:
+    """Embeds a text from its length, so no model needs downloading"""
+
+    def get_sentence_embedding_dimension(self):
+        return 2
+
+    def encode(self, texts, **kwargs):
+        return np.array([[1.0, len(text)] for text in texts], dtype=np.float32)
+
+
+@pytest.fixture
+def collection(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedding_service, "load_model", lambda *args: StubModel())
+    return chroma_service.create_collection(tmp_path / "chroma", "stub", "docs")
+
+
+def write(path, content, modified_ns):
+    path.write_bytes(content)
+    os.utime(path, ns=(modified_ns, modified_ns))
+
+
+def documents(collection):
+    return sorted(collection.get(include=["documents"])["documents"])
+
+
+def test_changed_file_is_reingested(tmp_path, collection):
+    docs_dir = tmp_path / "docs"
+    docs_dir.mkdir()
+    write(docs_dir / "a.txt", b"Old text.", 1_000_000_000)
+    write(docs_dir / "b.txt", b"Unchanged text.", 1_000_000_000)
+    chroma_service.process_and_add_documents(collection, docs_dir, 10)
+    assert documents(collection) == ["Old text.", "Unchanged text."]
+
+    write(docs_dir / "a.txt", b"New text.", 2_000_000_000)
+    chroma_service.process_and_add_documents(collection, docs_dir, 10)
+    assert documents(collection) == ["New text.", "Unchanged text."]
+    assert chroma_service.get_processed_files(collection)["a.txt"] == 2_000_000_000
+
+
+def test_changed_file_is_kept_if_it_fails_to_parse(tmp_path, collection):
+    docs_dir = tmp_path / "docs"
+    docs_dir.mkdir()
+    write(docs_dir / "a.txt", b"Old text.", 1_000_000_000)
+    chroma_service.process_and_add_documents(collection, docs_dir, 10)
+
+    # Not valid UTF-8, so the text reader fails
+    write(docs_dir / "a.txt", b"\xff\xfe broken", 2_000_000_000)
+    chroma_service.process_and_add_documents(collection, docs_dir, 10)
+    assert documents(collection) == ["Old text."]
+    assert chroma_service.get_processed_files(collection)["a.txt"] == 1_000_000_000
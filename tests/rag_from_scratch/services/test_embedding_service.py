@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from rag_from_scratch.services import embedding_service
+from rag_from_scratch.services.embedding_cache import EmbeddingCache, hash_text
+from rag_from_scratch.services.embedding_service import encode_texts
+
+
+def embed(text):
+    return [len(text), ord(text[0]), 0.0, 1.0]
+
+
+class StubModel:
+    """Embeds a text from its length and first character, recording calls"""
+
+    def __init__(self):
+        self.calls = []
+
+    def get_sentence_embedding_dimension(self):
+        return 4
+
+    def encode(self, texts, batch_size, **kwargs):
+        self.calls.append((texts, batch_size))
+        return np.array([embed(text) for text in texts], dtype=np.float32)
+
+
+@pytest.fixture
+def model(monkeypatch):
+    model = StubModel()
+    monkeypatch.setattr(embedding_service, "load_model", lambda *args: model)
+    return model
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return EmbeddingCache(tmp_path / "embeddings.sqlite")
+
+
+def test_hash_text():
+    assert hash_text("chunk") == hash_text("chunk")
+    assert hash_text("chunk") != hash_text("chunk ")
+    assert len(hash_text("chunk")) == 16
+
+
+def test_cache_round_trip(cache):
+    hashes = [hash_text(str(i)) for i in range(1200)]
+    embeddings = np.arange(1200 * 4, dtype=np.float32).reshape(1200, 4)
+    cache.put_many(hashes, embeddings, "model")
+
+    # More hashes than SQLite parameters per query, plus some misses
+    found = cache.get_many([*hashes, hash_text("missing")], "model")
+    assert len(found) == 1200
+    np.testing.assert_array_equal(found[hashes[1100]], embeddings[1100])
+    assert cache.get_many(hashes[:10], "other-model") == {}
+
+
+def test_encode_texts_keeps_input_order(model):
+    texts = ["medium text", "a", "a much longer text", "bb", "the longest text of all"]
+    embeddings = encode_texts(texts, "stub", batch_size=4)
+    np.testing.assert_array_equal(embeddings, [embed(text) for text in texts])
+
+    # Shortest bucket first, with twice the batch size, then the rest
+    assert model.calls == [
+        (["a", "bb"], 8),
+        (["medium text", "a much longer text"], 4),
+        (["the longest text of all"], 2),
+    ]
+
+
+def test_encode_texts_empty(model):
+    assert encode_texts([], "stub").shape == (0, 4)
+    assert model.calls == []
+
+
+def test_encode_texts_with_cache(model, cache):
+    cache.put_many([hash_text("cached")], np.array([[9.0, 9.0, 9.0, 9.0]]), "stub")
+
+    texts = ["new", "cached", "other new"]
+    embeddings = encode_texts(texts, "stub", cache=cache)
+    np.testing.assert_array_equal(
+        embeddings, [embed("new"), [9.0, 9.0, 9.0, 9.0], embed("other new")]
+    )
+    # Only the misses are encoded, and they are written back
+    assert sorted(text for texts, _ in model.calls for text in texts) == [
+        "new",
+        "other new",
+    ]
+    assert len(cache.get_many([hash_text(text) for text in texts], "stub")) == 3
+
+    model.calls.clear()
+    np.testing.assert_array_equal(encode_texts(texts, "stub", cache=cache), embeddings)
+    assert model.calls == []
+
+
+def test_encode_texts_caches_int8_separately(model, cache):
+    encode_texts(["text"], "stub", cache=cache)
+    model.calls.clear()
+    encode_texts(["text"], "stub", dtype="int8", cache=cache)
+    assert model.calls == [(["text"], 128)]
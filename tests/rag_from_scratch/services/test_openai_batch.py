@@ -0,0 +1,57 @@
+import json
+from types import SimpleNamespace
+
+from rag_from_scratch.services import openai_batch
+from rag_from_scratch.services.openai_batch import poll_and_collect
+
+QUERIES = ["What is RAG?", "How are chunks split?"]
+
+
+def success(i, content):
+    body = {"choices": [{"message": {"content": content}}]}
+    return {
+        "custom_id": f"request-{i}",
+        "response": {"status_code": 200, "body": body},
+        "error": None,
+    }
+
+
+def failure(i):
+    body = {"error": {"message": "Invalid model"}}
+    return {
+        "custom_id": f"request-{i}",
+        "response": {"status_code": 400, "body": body},
+        "error": None,
+    }
+
+
+class FakeClient:
+    def __init__(self, files, **batch):
+        self.batch = SimpleNamespace(status="completed", **batch)
+        self.files_by_id = files
+        self.batches = SimpleNamespace(retrieve=lambda batch_id: self.batch)
+        self.files = SimpleNamespace(content=self.content)
+
+    def content(self, file_id):
+        lines = self.files_by_id[file_id]
+        return SimpleNamespace(text="".join(json.dumps(line) + "\n" for line in lines))
+
+
+def test_poll_and_collect(monkeypatch):
+    client = FakeClient(
+        {"out": [success(1, "Into sentences.")], "err": [failure(0)]},
+        output_file_id="out",
+        error_file_id="err",
+    )
+    monkeypatch.setattr(openai_batch, "get_client", lambda: client)
+    assert poll_and_collect("batch", QUERIES) == {
+        "How are chunks split?": "Into sentences."
+    }
+
+
+def test_poll_and_collect_every_request_failed(monkeypatch):
+    client = FakeClient(
+        {"err": [failure(0), failure(1)]}, output_file_id=None, error_file_id="err"
+    )
+    monkeypatch.setattr(openai_batch, "get_client", lambda: client)
+    assert poll_and_collect("batch", QUERIES) == {}
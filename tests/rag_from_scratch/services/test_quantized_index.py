@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+from rag_from_scratch.services import chroma_service, quantized_index
+from rag_from_scratch.services.quantized_index import QuantizedIndex, quantize_int8
+
+EMBEDDINGS = {
+    "north": [1.0, 0.0, 0.0],
+    "north-east": [0.7071, 0.7071, 0.0],
+    "east": [0.0, 1.0, 0.0],
+    "up": [0.0, 0.0, 1.0],
+}
+
+
+def fake_encode_texts(texts, model_name, dtype="auto", **kwargs):
+    return np.array([EMBEDDINGS[text] for text in texts], dtype=np.float32)
+
+
+class FakeCollection:
+    name = "fake"
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+    def count(self):
+        return len(self.embeddings)
+
+    def get(self, ids=None, include=()):
+        # Return records in reverse order, as Chroma does not keep the order
+        # of the requested ids
+        ids = list(reversed(ids if ids is not None else list(self.embeddings)))
+        return {
+            "ids": ids,
+            "embeddings": np.array([self.embeddings[id_] for id_ in ids]),
+            "documents": [f"doc {id_}" for id_ in ids],
+            "metadatas": [{"source": f"{id_}.txt", "chunk": 0} for id_ in ids],
+        }
+
+
+@pytest.fixture(params=["simsimd", "numpy"])
+def index(request, tmp_path, monkeypatch):
+    monkeypatch.setattr(quantized_index, "encode_texts", fake_encode_texts)
+    if request.param == "numpy":
+        monkeypatch.setattr(quantized_index, "simsimd", None)
+        # Several blocks even for a handful of vectors
+        monkeypatch.setattr(quantized_index, "SCAN_BLOCK_ROWS", 2)
+    elif quantized_index.simsimd is None:
+        pytest.skip("simsimd not installed")
+    index = QuantizedIndex(tmp_path / "index.npz", "fake-model")
+    index.add(list(EMBEDDINGS), np.array(list(EMBEDDINGS.values())))
+    return index
+
+
+def test_quantize_int8():
+    embeddings = np.array([[0.5, -0.25, 0.0], [0.0, 0.0, 0.0]], dtype=np.float32)
+    vectors, scales = quantize_int8(embeddings)
+    assert vectors.dtype == np.int8
+    assert vectors[0].tolist() == [127, -64, 0]
+    # All-zero vectors get a unit scale instead of dividing by zero
+    assert scales.tolist() == [pytest.approx(0.5 / 127), 1.0]
+    np.testing.assert_allclose(vectors * scales[:, None], embeddings, atol=0.002)
+
+
+def test_search(index):
+    ids, distances = index.search("north", 3)
+    assert ids == ["north", "north-east", "east"]
+    assert distances == pytest.approx([0.0, 0.2929, 1.0], abs=0.01)
+
+
+def test_search_more_results_than_vectors(index):
+    ids, _ = index.search("up", 10)
+    assert len(ids) == len(EMBEDDINGS)
+    assert ids[0] == "up"
+
+
+def test_remove(index):
+    index.remove(["north", "unknown"])
+    assert len(index) == 3
+    ids, _ = index.search("north", 1)
+    assert ids == ["north-east"]
+
+    index.remove(list(EMBEDDINGS))
+    assert index.search("north", 1) == ([], [])
+
+
+def test_add_and_remove_persist_on_save(index):
+    # Changes are only written to the sidecar file by save()
+    assert not index.path.exists()
+    index.remove(["east"])
+    index.save()
+
+    reloaded = QuantizedIndex(index.path, "fake-model")
+    assert len(reloaded) == 3
+    assert reloaded.search("east", 1)[0] == ["north-east"]
+
+
+def test_sync(index):
+    collection = FakeCollection({"east": EMBEDDINGS["east"], "up": EMBEDDINGS["up"]})
+    index.sync(collection)
+    assert sorted(index.search("north", 10)[0]) == ["east", "up"]
+    # A rebuild is saved straight away
+    assert len(QuantizedIndex(index.path, "fake-model")) == 2
+
+
+def test_semantic_search_keeps_index_order(index):
+    results = chroma_service.semantic_search(
+        FakeCollection(EMBEDDINGS), "north", n_results=3, index=index
+    )
+    assert results["ids"] == [["north", "north-east", "east"]]
+    assert results["documents"] == [["doc north", "doc north-east", "doc east"]]
+    assert [meta["source"] for meta in results["metadatas"][0]] == [
+        "north.txt",
+        "north-east.txt",
+        "east.txt",
+    ]
+    assert results["distances"][0][0] == pytest.approx(0.0, abs=0.01)
@@ -0,0 +1,78 @@
+import asyncio
+
+import httpx
+import pytest
+from openai import APITimeoutError
+
+from rag_from_scratch.services import openai_service, response_cache
+from rag_from_scratch.services.response_cache import ResponseCache
+
+MESSAGES = [{"role": "user", "content": "What is RAG?"}]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(response_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_make_key_is_stable():
+    key = ResponseCache.make_key(messages=MESSAGES, model="gpt", temperature=0)
+    # Independent of keyword order, but not of the values
+    assert key == ResponseCache.make_key(temperature=0, model="gpt", messages=MESSAGES)
+    assert key != ResponseCache.make_key(messages=MESSAGES, model="gpt", temperature=1)
+    assert len(key) == 32
+
+
+def test_get_and_put(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+    assert cache.get("key") is None
+    cache.put("key", "first")
+    cache.put("key", "second")
+    assert cache.get("key") == "second"
+    # Entries outlive the connection
+    assert ResponseCache(tmp_path / "cache.sqlite").get("key") == "second"
+
+
+def test_expired_entries_are_deleted(tmp_path, clock):
+    cache = ResponseCache(tmp_path / "cache.sqlite", ttl=60)
+    cache.put("old", "response")
+    clock[0] += 30
+    cache.put("new", "response")
+    assert cache.get("old") == "response"
+
+    clock[0] += 31
+    assert cache.get("old") is None
+    count = "SELECT COUNT(*) FROM responses"
+    assert cache._conn.execute(count).fetchone()[0] == 1
+
+    clock[0] += 60
+    assert cache.prune() == 1
+    assert cache._conn.execute(count).fetchone()[0] == 0
+
+
+def test_expired_entries_are_pruned_on_open(tmp_path, clock):
+    ResponseCache(tmp_path / "cache.sqlite", ttl=60).put("key", "response")
+    clock[0] += 61
+    cache = ResponseCache(tmp_path / "cache.sqlite", ttl=60)
+    assert cache._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 0
+
+
+class FailingClient:
+    def __init__(self):
+        self.chat = self
+        self.completions = self
+
+    async def create(self, **params):
+        raise APITimeoutError(request=httpx.Request("POST", "https://example.com"))
+
+
+def test_errors_are_not_cached(tmp_path, monkeypatch):
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+    monkeypatch.setattr(openai_service, "get_response_cache", lambda: cache)
+    monkeypatch.setattr(openai_service, "get_client", FailingClient)
+
+    with pytest.raises(APITimeoutError):
+        asyncio.run(openai_service.create_chat_completion(MESSAGES, model="gpt"))
+    assert cache._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 0
@@ -0,0 +1,72 @@
+import chromadb
+import numpy as np
+import pytest
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+from rag_from_scratch.services import semantic_cache
+from rag_from_scratch.services.semantic_cache import SemanticCache
+
+VECTORS = {
+    "What is RAG?": [1.0, 0.0],
+    # A paraphrase at inner-product distance 0.01
+    "what is rag": [0.99, np.sqrt(1 - 0.99**2)],
+    "How are chunks split?": [0.0, 1.0],
+}
+
+
+class StubEmbedder(EmbeddingFunction[Documents]):
+    def __call__(self, input: Documents) -> Embeddings:
+        return [np.array(VECTORS[text], dtype=np.float32) for text in input]
+
+
+@pytest.fixture
+def collection(tmp_path):
+    client = chromadb.PersistentClient(path=str(tmp_path / "chroma"))
+    return client.create_collection(
+        "cache", embedding_function=StubEmbedder(), metadata={"hnsw:space": "ip"}
+    )
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(semantic_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_lookup_within_distance(collection):
+    cache = SemanticCache(collection, max_distance=0.05)
+    assert cache.lookup("What is RAG?") is None
+    cache.store("What is RAG?", "An answer", ["a.txt (chunk 0)"])
+
+    # A fresh instance has no exact-match entries, so the collection is queried
+    cache = SemanticCache(collection, max_distance=0.05)
+    assert cache.lookup("what is rag") == ("An answer", ["a.txt (chunk 0)"])
+    assert cache.lookup("How are chunks split?") is None
+
+    strict = SemanticCache(collection, max_distance=0.005)
+    assert strict.lookup("what is rag") is None
+
+
+def test_exact_matches_are_evicted_least_recently_used(collection):
+    cache = SemanticCache(collection, max_exact=2)
+    cache.store("What is RAG?", "first", [])
+    cache.store("what is rag", "second", [])
+    assert cache.lookup("What is RAG?") == ("first", [])
+
+    cache.store("How are chunks split?", "third", [])
+    assert list(cache._exact) == ["What is RAG?", "How are chunks split?"]
+
+
+def test_expired_entries_are_pruned(collection, clock):
+    cache = SemanticCache(collection, ttl=60)
+    cache.store("What is RAG?", "old", [])
+    clock[0] += 30
+    cache.store("How are chunks split?", "new", [])
+
+    clock[0] += 31
+    cache = SemanticCache(collection, ttl=60)
+    assert collection.get(include=["documents"])["documents"] == [
+        "How are chunks split?"
+    ]
+    assert cache.lookup("What is RAG?") is None
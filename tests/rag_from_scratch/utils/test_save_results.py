@@ -0,0 +1,93 @@
+import csv
+import io
+import threading
+
+from rag_from_scratch.utils import save_results
+from rag_from_scratch.utils.save_results import (
+    RagResultsWriter,
+    format_row,
+    save_rag_results,
+    save_rag_results_batch,
+    wait_for_results,
+)
+
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def test_results_writer(tmp_path):
+    path = tmp_path / "results.csv"
+    with RagResultsWriter(path) as writer:
+        writer.append("q1", "r1", ["a.txt (chunk 0)", "b.txt (chunk 1)"])
+        writer.append("q2", "r2", [])
+    assert read_rows(path) == [
+        ["Query", "Response", "Sources"],
+        ["q1", "r1", "a.txt (chunk 0)\nb.txt (chunk 1)"],
+        ["q2", "r2", ""],
+    ]
+
+
+def test_results_writer_appends_without_repeating_header(tmp_path):
+    path = tmp_path / "results.csv"
+    save_rag_results(path, "q1", "r1", ["a.txt"])
+    wait_for_results()
+    with RagResultsWriter(path) as writer:
+        writer.append("q2", "r2", ["b.txt"])
+    assert read_rows(path) == [
+        ["Query", "Response", "Sources"],
+        ["q1", "r1", "a.txt"],
+        ["q2", "r2", "b.txt"],
+    ]
+
+
+def test_save_rag_results_reuses_open_file(tmp_path):
+    path = tmp_path / "results.csv"
+    save_rag_results(path, "q1", "r1", ["a.txt"])
+    save_rag_results(path, "q2", "r2", ["b.txt"])
+    wait_for_results()
+    assert read_rows(path) == [
+        ["Query", "Response", "Sources"],
+        ["q1", "r1", "a.txt"],
+        ["q2", "r2", "b.txt"],
+    ]
+
+
+def test_save_rag_results_survives_unexpected_errors(tmp_path, monkeypatch):
+    def fail(filepath, results):
+        raise TypeError("unexpected")
+
+    monkeypatch.setattr(save_results, "save_rag_results_batch", fail)
+    save_rag_results(tmp_path / "failed.csv", "q1", "r1", [])
+    waiter = threading.Thread(target=wait_for_results, daemon=True)
+    waiter.start()
+    waiter.join(timeout=5)
+    assert not waiter.is_alive()
+
+    # The writer thread is still running and writes the next results
+    monkeypatch.undo()
+    path = tmp_path / "results.csv"
+    save_rag_results(path, "q2", "r2", [])
+    wait_for_results()
+    assert read_rows(path)[1:] == [["q2", "r2", ""]]
+
+
+def test_save_rag_results_batch(tmp_path):
+    path = tmp_path / "results.csv"
+    results = [
+        {"query": f"q{i}", "response": f"r{i}", "sources": [f"{i}.txt"]}
+        for i in range(5)
+    ]
+    save_rag_results_batch(path, iter(results), batch_size=2)
+    assert read_rows(path) == [["Query", "Response", "Sources"]] + [
+        [f"q{i}", f"r{i}", f"{i}.txt"] for i in range(5)
+    ]
+
+
+def test_format_row_matches_csv_writer():
+    fields = ["plain", 'say "hi"', "a, b", "line\nbreak", "cr\r", "", "é ü", None, 1.5]
+    for field in fields:
+        expected = io.StringIO()
+        csv.writer(expected).writerow([field, "x", field])
+        assert format_row(field, "x", field) == expected.getvalue().encode()